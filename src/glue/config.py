@@ -6,7 +6,7 @@ from typing import Final, Optional, TypedDict, Literal
 
 from basecfg import BaseCfg, opt
 
-from .models import BasicSecurityUserBulkEntry
+from .models import BasicSecurityUserBulkEntry, SecUserRoleEntry
 
 supported_db_dialects: Final = (
     "postgresql",
@@ -33,12 +33,9 @@ class GlueConfig(BaseCfg):
         doc="directory from which to load CSV-format input data files",
     )
 
-    batch_size: Optional[int] = opt(
-        default=None,
-        doc=(
-            "batch size to use during bulk insert, see "
-            "https://zillow.github.io/ctds/bulk_insert.html#batch-size"
-        ),
+    batch_size: int = opt(
+        default=10000,
+        doc="number of rows to send to the database at a time during bulk inserts",
     )
 
     atlas_username: str = opt(
@@ -147,6 +144,63 @@ class GlueConfig(BaseCfg):
         doc="the path to WebAPI on its host, this is almost always /WebAPI",
     )
 
+    role_mapping_file: Optional[str] = opt(
+        default=None,
+        doc=(
+            "sync WebAPI role memberships from a csv file; for the users and roles "
+            "named in the file, memberships which aren't listed are removed; when "
+            "given, bulk users are no longer made admins automatically; requires "
+            "these headings: "
+        )
+        + ",".join(SecUserRoleEntry._fields),
+    )
+
+    provision_sec_users: bool = opt(
+        default=False,
+        doc=(
+            "create the WebAPI sec_user and sec_user_role entries for bulk users "
+            "directly in the ohdsi schema, instead of signing-in to WebAPI as "
+            "each created or updated user"
+        ),
+    )
+
+    webapi_pool_size: int = opt(
+        default=10,
+        doc=(
+            "maximum number of keep-alive connections kept open to webapi; these "
+            "are shared by every webapi request glue makes"
+        ),
+    )
+
+    webapi_login_workers: int = opt(
+        default=4,
+        doc=(
+            "number of bulk user webapi sign-ins (which initialize each user's "
+            "webapi security entries) to run concurrently"
+        ),
+    )
+
+    webapi_keepalive: bool = opt(
+        default=True,
+        doc="whether to reuse connections to webapi between requests",
+    )
+
+    webapi_retries: int = opt(
+        default=3,
+        doc=(
+            "how many times to retry a webapi request which fails to connect or "
+            "gets a 502, 503, or 504 response"
+        ),
+    )
+
+    webapi_backoff: float = opt(
+        default=0.5,
+        doc=(
+            "backoff factor, in seconds, between webapi request retries; the "
+            "delay doubles with each retry"
+        ),
+    )
+
     init_concept_hierarchy: bool = opt(
         default=True,
         doc=(
@@ -243,6 +297,59 @@ class GlueConfig(BaseCfg):
         ),
     )
 
+    enable_vocabulary_load: bool = opt(
+        default=False,
+        doc=(
+            "load the tab-delimited athena vocabulary files (CONCEPT.csv, etc.) "
+            "found in input_dir into the vocab schema; files which haven't "
+            "changed since they were last loaded are skipped"
+        ),
+    )
+
+    vocabulary_workers: int = opt(
+        default=4,
+        doc="number of vocabulary files to load concurrently",
+    )
+
+    vocabulary_defer_indexes: bool = opt(
+        default=True,
+        doc=(
+            "drop the indexes on the vocabulary tables before a vocabulary load, "
+            "and rebuild them afterwards (the foreign keys on and referencing "
+            "them are always dropped and rebuilt, since the tables can't be "
+            "truncated otherwise)"
+        ),
+    )
+
+    index_workers: int = opt(
+        default=4,
+        doc="number of deferred indexes and foreign keys to rebuild concurrently",
+    )
+
+    index_maxdop: int = opt(
+        default=0,
+        doc=(
+            "on sql server, the MAXDOP (max degree of parallelism) to rebuild "
+            "each index with (default: 0, the server setting)"
+        ),
+    )
+
+    ddl_workers: int = opt(
+        default=4,
+        doc=(
+            "number of CDM database connections to run the independent "
+            "statements of the WebAPI-generated results DDL over"
+        ),
+    )
+
+    operation_workers: int = opt(
+        default=4,
+        doc=(
+            "number of the enabled operations which may run concurrently (each "
+            "operation still waits for the ones it depends on)"
+        ),
+    )
+
     enable_basic_security: bool = opt(
         default=True,
         doc=(
@@ -266,6 +373,61 @@ class GlueConfig(BaseCfg):
         + ",".join(BasicSecurityUserBulkEntry._fields),
     )
 
+    bulk_user_delete: bool = opt(
+        default=False,
+        doc=(
+            "delete users which are in the security db but not in the bulk user "
+            "file, along with their WebAPI role memberships"
+        ),
+    )
+
+    bulk_user_workers: int = opt(
+        default=4,
+        doc=(
+            "number of worker threads used to hash and verify bulk user "
+            "passwords with bcrypt"
+        ),
+    )
+
+    bcrypt_rounds: int = opt(
+        default=12,
+        doc="bcrypt cost factor (log2 of the rounds) used to hash new passwords",
+    )
+
+    bcrypt_target_latency: float = opt(
+        default=0.0,
+        doc=(
+            "if given, benchmark this host at startup and use the highest bcrypt "
+            "cost (at least 10) which hashes a password within this many seconds, "
+            "instead of bcrypt_rounds"
+        ),
+    )
+
+    bcrypt_cache_file: Optional[str] = opt(
+        default=None,
+        doc=(
+            "path to a file which remembers the bulk users whose passwords were "
+            "already verified, so unchanged users can skip the bcrypt check on "
+            "later runs; requires bcrypt_cache_secret"
+        ),
+    )
+
+    bcrypt_cache_secret: str = opt(
+        default="",
+        doc="secret key used to sign the entries in the bcrypt_cache_file",
+        redact=True,
+    )
+
+    bulk_user_merge_join: bool = opt(
+        default=False,
+        doc=(
+            "reconcile the bulk user file with the security db by streaming both "
+            "sides sorted by username (the file via an on-disk sort) instead of "
+            "indexing them in memory; use this to keep memory use low with very "
+            "large user lists"
+        ),
+    )
+
     db_timeout: int = opt(
         default=3600,
         doc="timeout for database requests, in seconds",
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""defer the indexes and foreign keys on tables until after a bulk load"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Final, Iterable, List, NamedTuple
+
+from ..config import GlueConfig
+from .multidb import MultiDB
+from .utils import ensure_table, execute_ddl
+
+logger = logging.getLogger(__name__)
+
+# the table (in the schema of the deferred tables) which remembers what has
+# been dropped, so that an interrupted run can rebuild it the next time
+deferred_ddl_table: Final = "glue_deferred_ddl"
+
+# indexes are rebuilt first, so foreign keys can use them to validate
+rebuild_order: Final = ("index", "foreign key")
+
+
+class DeferredDDL(NamedTuple):
+    """an index or foreign key which has been dropped (or disabled)"""
+
+    kind: str
+    table_name: str
+    object_name: str
+    drop_sql: str
+    rebuild_sql: str
+
+
+def defer_ddl(
+    db: MultiDB,
+    schema: str,
+    tables: Iterable[str],
+    maxdop: int = 0,
+    indexes: bool = True,
+) -> List[DeferredDDL]:
+    """
+    drop the foreign keys on (or referencing) the given tables and, unless
+    indexes is false, drop the other indexes on them (on sql server the
+    indexes are disabled instead); what was dropped is recorded in the same
+    transaction, for rebuild_ddl; primary keys and unique constraints are
+    kept; foreign keys on tables in
+    other schemas (whose table_name is schema-qualified) are re-created
+    without checking their existing rows, so that e.g. a CDM table isn't
+    scanned to rebuild them
+    """
+    ensure_table(db, schema, deferred_ddl_table, "ddl_deferred_ddl.sql")
+    deferred = [
+        DeferredDDL._make(row)
+        for row in db.get_rows(
+            db.dialect_sqlfile("get_deferrable_ddl.sql"),
+            schema=schema,
+            tables=list(tables),
+            LIT_maxdop=maxdop,
+        )
+        if indexes or row[0] != "index"
+    ]
+    if not deferred:
+        return deferred
+    if outside := [ddl for ddl in deferred if "." in ddl.table_name]:
+        logger.warning(
+            "foreign key(s) outside the %s schema reference the tables being "
+            "loaded; they will be re-created without validating their rows: %s",
+            schema,
+            ", ".join(f"{ddl.object_name} on {ddl.table_name}" for ddl in outside),
+        )
+    # foreign keys can depend on indexes, so they're dropped first
+    deferred.sort(key=lambda ddl: -rebuild_order.index(ddl.kind))
+    with db.transaction():
+        db.execute_many(
+            MultiDB.sqlfile("save_deferred_ddl.sql"),
+            (ddl._asdict() for ddl in deferred),
+            ID_schema=schema,
+        )
+        for ddl in deferred:
+            logger.info(
+                "deferring %s %s on %s", ddl.kind, ddl.object_name, ddl.table_name
+            )
+            execute_ddl(db, ddl.drop_sql)
+    return deferred
+
+
+def rebuild_one(
+    db_params: GlueConfig.MultiDBArgDict, schema: str, ddl: DeferredDDL
+) -> float:
+    """
+    rebuild the given index or foreign key on its own connection, then forget
+    it; the drop is repeated first since a failed build (e.g. postgres' CREATE
+    INDEX CONCURRENTLY) can leave a half-built object behind; returns the
+    number of seconds the rebuild took
+    """
+    started = time.perf_counter()
+    with MultiDB(**db_params) as db:
+        with db.autocommit():
+            execute_ddl(db, ddl.drop_sql)
+            try:
+                execute_ddl(db, ddl.rebuild_sql)
+            except Exception as exc:  # pylint: disable=W0718
+                # online index operations need sql server enterprise edition
+                if "ONLINE = ON" not in ddl.rebuild_sql:
+                    raise
+                logger.warning(
+                    "online rebuild of %s failed (%s); rebuilding offline",
+                    ddl.object_name,
+                    exc,
+                )
+                execute_ddl(db, ddl.rebuild_sql.replace("ONLINE = ON", "ONLINE = OFF"))
+        db.execute(
+            MultiDB.sqlfile("delete_deferred_ddl.sql"),
+            ID_schema=schema,
+            kind=ddl.kind,
+            table_name=ddl.table_name,
+            object_name=ddl.object_name,
+        )
+    return time.perf_counter() - started
+
+
+def rebuild_ddl(db_params: GlueConfig.MultiDBArgDict, schema: str, workers: int):
+    """
+    rebuild every index and foreign key recorded by defer_ddl, each on its
+    own connection from a pool of the given number of workers; postgres
+    indexes are built CONCURRENTLY and sql server ones ONLINE, so the tables
+    stay readable meanwhile; the ones which fail stay recorded (to be retried
+    next time) and a RuntimeError is raised once the rest are done
+    """
+    with MultiDB(**db_params) as db:
+        if deferred_ddl_table not in db.list_tables(schema):
+            return
+        pending = [
+            DeferredDDL._make(row)
+            for row in db.get_rows(
+                MultiDB.sqlfile("get_deferred_ddl.sql"), ID_schema=schema
+            )
+        ]
+    if not pending:
+        return
+
+    failures: List[str] = []
+    total = len(pending)
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        for kind in rebuild_order:
+            futures = {
+                pool.submit(rebuild_one, db_params, schema, ddl): ddl
+                for ddl in pending
+                if ddl.kind == kind
+            }
+            for future in as_completed(futures):
+                ddl = futures[future]
+                done += 1
+                if (exc := future.exception()) is not None:
+                    logger.error(
+                        "unable to rebuild %s %s on %s (%s/%s): %s",
+                        ddl.kind,
+                        ddl.object_name,
+                        ddl.table_name,
+                        done,
+                        total,
+                        exc,
+                    )
+                    failures.append(ddl.object_name)
+                else:
+                    logger.info(
+                        "rebuilt %s %s on %s (%s/%s) in %.1fs",
+                        ddl.kind,
+                        ddl.object_name,
+                        ddl.table_name,
+                        done,
+                        total,
+                        future.result(),
+                    )
+    if failures:
+        raise RuntimeError(f"unable to rebuild: {', '.join(failures)}")
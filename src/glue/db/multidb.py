@@ -4,23 +4,36 @@
 # pylint: disable=R0913
 import contextlib
 import functools
+import io
+import itertools
 import logging
 import re
 import string
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from importlib import resources
 from typing import (
     Any,
     Dict,
     Final,
+    Iterable,
+    Iterator,
     List,
     NamedTuple,
+    Sequence,
     Tuple,
     Callable,
+    ContextManager,
     TypeAlias,
     Union,
     Optional,
+    Set,
+    cast,
 )
 
+import psycopg2.extras
 import sqlparams
 
 from . import mssql
@@ -34,6 +47,47 @@ logger = logging.getLogger(__name__)
 identifier_prefix: Final = "ID_"
 literal_prefix: Final = "LIT_"
 
+# how many items to put in a list param at once; this keeps queries under sql
+# server's limit of 2100 paramaters per statement
+max_list_params: Final = 1000
+
+# how many parameter sets execute_many sends to the server per round trip
+default_page_size: Final = 1000
+
+# how many compiled query templates compile_query keeps
+query_cache_size: Final = 256
+
+# statements which can change the schemas & tables in the database; when one
+# of these is executed the catalog snapshot is thrown away
+ddl_re: Final = re.compile(r"\b(?:CREATE|DROP|ALTER|RENAME|SP_RENAME)\b", re.IGNORECASE)
+
+# used to give each server-side cursor a unique name
+cursor_ids: Final = itertools.count()
+
+# used to give each savepoint a unique name
+savepoint_ids: Final = itertools.count()
+
+# the (set, release, rollback to) savepoint statements for each dialect; sql
+# server has no way to release a savepoint, they last until the transaction ends
+savepoint_sql: Final = {
+    "postgresql": (
+        "SAVEPOINT {}",
+        "RELEASE SAVEPOINT {}",
+        "ROLLBACK TO SAVEPOINT {}",
+    ),
+    "sql server": (
+        "SAVE TRANSACTION {}",
+        None,
+        "ROLLBACK TRANSACTION {}",
+    ),
+}
+
+# suffixes used by dialect_sqlfile to find the variant of a query for a dialect
+dialect_sqlfile_suffix: Final = {
+    "postgresql": "postgresql",
+    "sql server": "mssql",
+}
+
 DBConnection = Union[mssql.Connection, postgres.Connection]
 
 ConnectFunc: TypeAlias = Callable[
@@ -58,37 +112,135 @@ def sqlfile(filename: str) -> str:
     return sql_file.read_text()
 
 
+# unicode word characters: "this includes most characters that can be part of a
+# word in any language, as well as numbers and the underscore"
+interpolation_safe_re: Final = re.compile(r"\w{1,128}")
+
+
 def interpolation_safe(value: str) -> bool:
     """
     return true if the given value is safe to use as a sql identifier or literal
     """
-    # unicode word characters: "this includes most characters that can be part of a
-    # word in any language, as well as numbers and the underscore"
-    if re.match(r"^\w{1,128}$", value):
-        return True
-    return False
+    return interpolation_safe_re.fullmatch(value) is not None
 
 
-class KeyFormatter(dict):
+def copy_text_value(value: Any) -> str:
     """
-    dict subclass which handles missing keys by returning the key itself
-    (after formatting the key with the given key_format)
+    return the given value in postgres' COPY text format, see:
+    https://www.postgresql.org/docs/current/sql-copy.html
+    """
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_text_buffer(rows: Iterable[Sequence[Any]]) -> io.StringIO:
+    """return a buffer holding the given rows in postgres' COPY text format"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(map(copy_text_value, row)))
+        buffer.write("\n")
+    buffer.seek(0)
+    return buffer
+
+
+class QueryFormatter(string.Formatter):
+    """
+    str.Formatter subclass used by compile_query: it fills in the interpolated
+    values and list expansions it's given, and turns every other field into a
+    paramater reference (formatted by key_format), recording its name
     """
 
-    # this class is used by the adjust_paramstyle function
-
-    def __init__(self, key_format: str, *args, **kwargs):
-        """
-        creates a new instance with the given key_format (a str.format-style
-        string format template)
-        """
-        # https://docs.python.org/3/library/string.html#format-string-syntax
+    def __init__(
+        self,
+        key_format: str,
+        interpolated: Dict[str, str],
+        list_sizes: Dict[str, int],
+    ):
+        super().__init__()
         self.key_format = key_format
-        super().__init__(*args, **kwargs)
+        self.interpolated = interpolated
+        self.list_sizes = list_sizes
+        self.names: Dict[str, None] = {}  # an ordered set
+
+    def placeholder(self, name: str) -> str:
+        """return the paramater reference for the given paramater name"""
+        self.names[name] = None
+        return self.key_format.format(name)
+
+    def get_value(self, key, args, kwargs) -> str:
+        """returns the value or paramater reference for the given field"""
+        if key in self.interpolated:
+            return self.interpolated[key]
+        if key in self.list_sizes:
+            return ", ".join(
+                self.placeholder(f"{key}__{i}") for i in range(self.list_sizes[key])
+            )
+        return self.placeholder(key)
+
 
-    def __missing__(self, key) -> str:
-        """returns the key itself, formatted by key_format"""
-        return self.key_format.format(key)
+class CompiledQuery(NamedTuple):
+    """a query template formatted for one dialect, ready for the db driver"""
+
+    sql: str
+    # for drivers using the qmark paramstyle, the names of the paramaters in
+    # the order they're referenced; None when the driver takes named params
+    param_order: Optional[Tuple[str, ...]]
+
+    def bind(self, params: Dict[str, Any]) -> Union[Dict[str, Any], List[Any]]:
+        """return the given named paramaters in the form the driver wants"""
+        if self.param_order is None:
+            return params
+        return [params[name] for name in self.param_order]
+
+
+@functools.lru_cache(maxsize=query_cache_size)
+def compile_query(
+    query: str,
+    dialect: str,
+    interpolated: Tuple[Tuple[str, str], ...],
+    list_sizes: Tuple[Tuple[str, int], ...],
+) -> CompiledQuery:
+    """
+    compile the given sql query template (with python str.format-style
+    paramater references) for the given dialect; interpolated holds the
+    (already safety-checked) identifier and literal values to put into the
+    query and list_sizes the length of each list paramater; the result is
+    cached, so each distinct template and set of interpolated values is only
+    parsed once
+    see: https://www.python.org/dev/peps/pep-0249/#paramstyle
+    and: https://docs.python.org/3/library/string.html#format-string-syntax
+    """
+    # the query:
+    #   select * from turtles where (name={turtle})
+    # is changed to this when the dialect is postgres:
+    #   select * from turtles where (name=%(turtle)s)
+    # and this when the dialect is sql server:
+    #   select * from turtles where (name=?)
+    if dialect == "sql server":
+        key_format = ":{}"
+    elif dialect == "postgresql":
+        key_format = "%({})s"
+    else:
+        raise RuntimeError("Unrecognized database dialect: " + dialect)
+
+    formatter = QueryFormatter(key_format, dict(interpolated), dict(list_sizes))
+    formatted_query = formatter.vformat(query, [], {})
+    if dialect != "sql server":
+        return CompiledQuery(formatted_query, None)
+
+    # passing each name as its own value gives us the paramater order
+    p_query = sqlparams.SQLParams("named", "qmark")
+    final_query, param_order = p_query.format(
+        formatted_query, {name: name for name in formatter.names}
+    )
+    return CompiledQuery(final_query, tuple(param_order))
 
 
 class ColumnInfo(NamedTuple):
@@ -102,6 +254,91 @@ class ColumnInfo(NamedTuple):
     charset: str
 
 
+# dialect, server, user, password, database
+ConnectionKey: TypeAlias = Tuple[str, str, str, str, str]
+
+
+class ConnectionRegistry:
+    """
+    process-wide store of idle database connections, so that the operations
+    which each open a MultiDB for the same database can reuse one connection
+    instead of paying for a new (possibly TLS) connect every time; a
+    connection is only ever handed to one MultiDB at a time
+    """
+
+    idle: Dict[ConnectionKey, List[DBConnection]]
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle = defaultdict(list)
+
+    def checkout(
+        self, key: ConnectionKey, connect: Callable[[], DBConnection]
+    ) -> DBConnection:
+        """
+        return an idle connection for the given key which still responds, or
+        a new one from connect if there are none
+        """
+        while True:
+            with self.lock:
+                if not self.idle[key]:
+                    break
+                cnxn = self.idle[key].pop()
+            if self.ping(cnxn):
+                logger.debug("reusing connection to %s/%s", key[1], key[4])
+                return cnxn
+        logger.debug("opening connection to %s/%s", key[1], key[4])
+        return connect()
+
+    def checkin(self, key: ConnectionKey, cnxn: DBConnection):
+        """
+        return the given connection to the registry; any open transaction is
+        rolled back first, and connections which fail that are closed instead
+        """
+        try:
+            cnxn.rollback()
+        except Exception as exc:  # pylint: disable=W0718
+            logger.debug("discarding connection to %s/%s: %s", key[1], key[4], exc)
+            self.close(cnxn)
+            return
+        with self.lock:
+            self.idle[key].append(cnxn)
+
+    @staticmethod
+    def ping(cnxn: DBConnection) -> bool:
+        """return true if the given connection can still run a query"""
+        try:
+            cursor = cnxn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            cursor.close()
+            cnxn.rollback()
+            return True
+        except Exception as exc:  # pylint: disable=W0718
+            logger.debug("discarding dead connection: %s", exc)
+            ConnectionRegistry.close(cnxn)
+            return False
+
+    @staticmethod
+    def close(cnxn: DBConnection):
+        """close the given connection, ignoring errors"""
+        with contextlib.suppress(Exception):
+            cnxn.close()
+
+    def close_all(self):
+        """close every idle connection"""
+        with self.lock:
+            idle = [cnxn for cnxns in self.idle.values() for cnxn in cnxns]
+            self.idle.clear()
+        for cnxn in idle:
+            self.close(cnxn)
+        if idle:
+            logger.debug("closed %s idle database connection(s)", len(idle))
+
+
+connection_registry: Final = ConnectionRegistry()
+
+
 class MultiDB(contextlib.AbstractContextManager):
     """generic database wrapper"""
 
@@ -117,6 +354,7 @@ class MultiDB(contextlib.AbstractContextManager):
         self.dialect = dialect
         self.server = server
         self.database = database
+        self.config = config
 
         # fixme: consider passing-in a config instance or otherwise getting the
         # settings directly to the connect helper functions
@@ -132,64 +370,89 @@ class MultiDB(contextlib.AbstractContextManager):
                 connect_func = postgres.connect
         if not connect_func:
             raise RuntimeError("Unrecognized database dialect: " + dialect)
-        self.cnxn = connect_func(
-            server,
-            user,
-            password,
-            database,
-            config,
+        self.registry_key: ConnectionKey = (dialect, server, user, password, database)
+        self.cnxn = connection_registry.checkout(
+            self.registry_key,
+            functools.partial(
+                connect_func,
+                server,
+                user,
+                password,
+                database,
+                config,
+            ),
         )
+        self.in_transaction = False
+        # schema name -> table names; loaded on demand by the catalog method
+        self.catalog_snapshot: Optional[Dict[str, Set[str]]] = None
 
-    def __exit__(self, *args, **kwargs):
-        """close the database connection"""
-        return self.cnxn.__exit__(*args, **kwargs)
+    def __exit__(self, exc_type, *args, **kwargs):
+        """
+        commit (or on error, roll back) any pending work and hand the database
+        connection back to the registry for reuse
+        """
+        try:
+            if exc_type is None:
+                self.cnxn.commit()
+        finally:
+            connection_registry.checkin(self.registry_key, self.cnxn)
 
-    def query(self, query: str, **params: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    def cursor(self) -> ContextManager[Any]:
         """
-        given a sql query with python str.format-style paramater references,
-        adjust the paramater references to use the paramstyle appropriate for
-        the DB API dialect;
-        additionally: if the given params start with the identifier_prefix or
-        the literal_prefix, safety-check those values then interpolate them
-        into the query
-        returns a query_str, params_dict tuple suitable for passing to the db
-        driver
-        see: https://www.python.org/dev/peps/pep-0249/#paramstyle
-        and: https://docs.python.org/3/library/string.html#format-string-syntax
-        """
-        # the query:
-        #   select * from turtles where (name={turtle})
-        # is changed to this when the dialect is postgres:
-        #   select * from turtles where (name=%(turtle)s)
-        # and this when the dialect is sql server:
-        #   select * from turtles where (name=:turtle)
-
-        # sql identifiers and literals get safety-checked and are then
-        # string-interpolated into the query; other paramaters are passed to
-        # the db driver as proper paramaters
-        safe_values: Dict[str, Any] = {}
-        for param in tuple(params.keys()):
+        return a context manager giving a new cursor, which is closed when the
+        block ends; unlike the cursor's own context manager, it never commits
+        (pyodbc's commits on exit, so nothing would be left for transaction)
+        """
+        return contextlib.closing(self.cnxn.cursor())
+
+    def prepare(
+        self, query: str, **params: Dict[str, Any]
+    ) -> Tuple[CompiledQuery, Dict[str, Any]]:
+        """
+        compile the given sql query template (see compile_query) and return it
+        along with the named paramaters to bind to it;
+        if the given params start with the identifier_prefix or the
+        literal_prefix, their values are safety-checked then interpolated into
+        the query; list (or tuple) params are expanded into one paramater per
+        item, e.g. where name in ({turtles}) -> where name in (?, ?, ?)
+        """
+        interpolated: List[Tuple[str, str]] = []
+        list_sizes: List[Tuple[str, int]] = []
+        driver_params: Dict[str, Any] = {}
+        for param, value in params.items():
             if param.startswith(identifier_prefix) or param.startswith(literal_prefix):
-                param_value = str(params[param])
+                param_value = str(value)
                 if not interpolation_safe(param_value):
                     raise RuntimeError(
                         f"unsafe value encountered in interpolated param "
                         f"{param}: '{param_value}'"
                     )
-                safe_values[param] = param_value
-                del params[param]
-        if self.dialect == "sql server":
-            formatter = KeyFormatter(":{}", **safe_values)
-        elif self.dialect == "postgresql":
-            formatter = KeyFormatter("%({})s", **safe_values)
-        else:
-            raise RuntimeError("Unrecognized database dialect: " + self.dialect)
+                interpolated.append((param, param_value))
+            elif isinstance(value, (list, tuple)):
+                values = cast(List[Any], value)
+                if not values:
+                    raise RuntimeError(f"list param {param} cannot be empty")
+                list_sizes.append((param, len(values)))
+                driver_params.update(
+                    (f"{param}__{i}", item) for i, item in enumerate(values)
+                )
+            else:
+                driver_params[param] = value
+        compiled = compile_query(
+            query, self.dialect, tuple(sorted(interpolated)), tuple(sorted(list_sizes))
+        )
+        return compiled, driver_params
 
-        formatted_query = string.Formatter().vformat(query, [], formatter)
-        if self.dialect == "sql server":
-            p_query = sqlparams.SQLParams("named", "qmark")
-            formatted_query, params = p_query.format(formatted_query, params)
-        return formatted_query, params
+    def query(
+        self, query: str, **params: Dict[str, Any]
+    ) -> Tuple[str, Union[Dict[str, Any], List[Any]]]:
+        """
+        given a sql query with python str.format-style paramater references,
+        return a query_str, params tuple suitable for passing to the db driver;
+        see prepare for the details
+        """
+        compiled, driver_params = self.prepare(query, **params)
+        return compiled.sql, compiled.bind(driver_params)
 
     def get_column(self, sql: str, **params) -> List[Any]:
         """
@@ -198,7 +461,7 @@ class MultiDB(contextlib.AbstractContextManager):
         e.g. "SELECT name FROM ships" -> ["Rocinante", "Enterprise", "Orion III"]
         ...rather than [["Rocinante"], ["Enterprise"], ["Orion III"]]
         """
-        with self.cnxn.cursor() as cursor:
+        with self.cursor() as cursor:
             final_query, filtered_params = self.query(sql, **params)
             logger.debug(
                 "get_column: sending query (with %s-params): %s",
@@ -226,7 +489,7 @@ class MultiDB(contextlib.AbstractContextManager):
         an optional transformer function can be given which will be applied to each
         row of the results before they are returned
         """
-        with self.cnxn.cursor() as cursor:
+        with self.cursor() as cursor:
             final_query, filtered_params = self.query(sql, **params)
             logger.debug(
                 "get_rows: sending query (with %s-params): %s",
@@ -234,14 +497,56 @@ class MultiDB(contextlib.AbstractContextManager):
                 final_query,
             )
             cursor.execute(final_query, filtered_params)
-            self.cnxn.commit()
             rows = cursor.fetchall()
 
         return rows
 
+    def iter_rows(
+        self, sql: str, batch_size: int = default_page_size, **params
+    ) -> Iterator[Any]:
+        """
+        executes the given sql query and yields the resulting rows, fetching
+        them from the server batch_size at a time; on postgres a named
+        (server-side) cursor is used so the result set isn't buffered in
+        client memory, on sql server the cursor's arraysize is set to match;
+        the rows must be consumed before anything else is run on this db
+        """
+        final_query, filtered_params = self.query(sql, **params)
+        logger.debug(
+            "iter_rows: sending query (with %s-params): %s",
+            len(filtered_params),
+            final_query,
+        )
+        if self.dialect == "postgresql":
+            pg_cnxn = cast(postgres.Connection, self.cnxn)
+            cursor = pg_cnxn.cursor(name=f"glue_cursor_{next(cursor_ids)}")
+            cursor.itersize = batch_size
+        else:
+            cursor = self.cnxn.cursor()
+            cursor.arraysize = batch_size
+        with contextlib.closing(cursor):
+            cursor.execute(final_query, filtered_params)
+            while rows := cursor.fetchmany(batch_size):
+                yield from rows
+
+    def iter_column(
+        self, sql: str, batch_size: int = default_page_size, **params
+    ) -> Iterator[Any]:
+        """
+        like iter_rows, but for queries returning exactly one column: the
+        values of that column are yielded directly (see get_column)
+        """
+        for row in self.iter_rows(sql, batch_size, **params):
+            if len(row) != 1:
+                raise RuntimeError(
+                    f"iter_column returned a result set with {len(row)} columns "
+                    "instead of the expected 1 column"
+                )
+            yield row[0]
+
     def execute(self, sql: str, **params) -> None:
         """executes the given sql query on the given connection"""
-        with self.cnxn.cursor() as cursor:
+        with self.cursor() as cursor:
             final_query, filtered_params = self.query(sql, **params)
             logger.debug(
                 "execute: sending query (with %s-params): %s",
@@ -249,7 +554,178 @@ class MultiDB(contextlib.AbstractContextManager):
                 final_query,
             )
             cursor.execute(final_query, filtered_params)
+            if not self.in_transaction:
+                self.cnxn.commit()
+        if ddl_re.search(final_query):
+            self.catalog_snapshot = None
+
+    def execute_many(
+        self,
+        sql: str,
+        rows: Iterable[Dict[str, Any]],
+        page_size: int = default_page_size,
+        **params,
+    ) -> int:
+        """
+        executes the given sql query once for each of the given rows (dicts of
+        paramaters); the rows are sent to the server page_size at a time and
+        the work is committed once at the end; other given params (typically
+        identifiers and literals) apply to every row; returns the row count
+        """
+        compiled, shared_params = self.prepare(sql, **params)
+        logger.debug("execute_many: sending query: %s", compiled.sql)
+        row_iter = iter(rows)
+        count = 0
+        with self.cursor() as cursor:
+            while page := list(itertools.islice(row_iter, page_size)):
+                if shared_params:
+                    page = [{**shared_params, **row} for row in page]
+                if self.dialect == "sql server":
+                    cursor.fast_executemany = True  # type: ignore[union-attr]
+                    cursor.executemany(
+                        compiled.sql, [compiled.bind(row) for row in page]
+                    )
+                else:
+                    psycopg2.extras.execute_batch(
+                        cursor, compiled.sql, page, page_size=page_size
+                    )
+                count += len(page)
+            if not self.in_transaction:
+                self.cnxn.commit()
+        logger.debug("execute_many: sent %s rows", count)
+        return count
+
+    def bulk_insert(
+        self,
+        schema: str,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+    ) -> int:
+        """
+        insert the given rows (sequences of values in the order of the given
+        columns) into the given table, config.batch_size rows at a time; on
+        postgres each batch is streamed with COPY, on sql server it's sent with
+        pyodbc's fast_executemany; returns the row count
+        """
+        for name in (schema, table, *columns):
+            if not interpolation_safe(name):
+                raise RuntimeError(f"unsafe identifier given to bulk_insert: '{name}'")
+        column_list = ", ".join(columns)
+        batch_size = self.config.batch_size
+        start = time.perf_counter()
+        row_iter = iter(rows)
+        count = 0
+        with self.cursor() as cursor:
+            while batch := list(itertools.islice(row_iter, batch_size)):
+                if self.dialect == "postgresql":
+                    pg_cursor = cast(psycopg2.extensions.cursor, cursor)
+                    pg_cursor.copy_expert(
+                        f"COPY {schema}.{table} ({column_list}) FROM STDIN",
+                        copy_text_buffer(batch),
+                    )
+                else:
+                    placeholders = ", ".join("?" for _ in columns)
+                    cursor.fast_executemany = True  # type: ignore[union-attr]
+                    cursor.executemany(
+                        f"INSERT INTO {schema}.{table} ({column_list}) "
+                        f"VALUES ({placeholders})",
+                        batch,
+                    )
+                count += len(batch)
+                logger.debug("bulk_insert: sent %s rows to %s.%s", count, schema, table)
+            if not self.in_transaction:
+                self.cnxn.commit()
+        elapsed = time.perf_counter() - start
+        logger.info(
+            "bulk_insert: %s rows into %s.%s in %.1fs (%.0f rows/s)",
+            count,
+            schema,
+            table,
+            elapsed,
+            count / elapsed if elapsed else 0,
+        )
+        return count
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator["MultiDB"]:
+        """
+        context manager which defers the commit of the statements executed
+        within it until the block ends; if the block raises, the work is
+        rolled back instead; transactions can be nested: an inner block is a
+        savepoint, and its work is only committed along with the outermost
+        block; on postgres, an inner block which raises only rolls back its
+        own work; on sql server that isn't guaranteed (some errors doom the
+        whole transaction), so only rely on the outermost block being atomic
+        """
+        if self.in_transaction:
+            with self.savepoint():
+                yield self
+            return
+        # with mssql_autocommit every statement would commit on its own
+        autocommit = getattr(self.cnxn, "autocommit", False)
+        if autocommit:
+            self.cnxn.autocommit = False
+        self.in_transaction = True
+        try:
+            yield self
             self.cnxn.commit()
+        except BaseException:
+            self.cnxn.rollback()
+            # the snapshot may have been loaded after ddl which is now undone
+            self.catalog_snapshot = None
+            raise
+        finally:
+            self.in_transaction = False
+            if autocommit:
+                self.cnxn.autocommit = autocommit
+
+    @contextlib.contextmanager
+    def savepoint(self) -> Iterator["MultiDB"]:
+        """
+        context manager which sets a savepoint within the current transaction;
+        if the block raises, the work done since the savepoint is rolled back
+        (if that's still possible; either way the block's exception is raised)
+        """
+        if not self.in_transaction:
+            raise RuntimeError("savepoints require a transaction")
+        name = f"glue_savepoint_{next(savepoint_ids)}"
+        save_sql, release_sql, rollback_sql = savepoint_sql[self.dialect]
+        with self.cursor() as cursor:
+            cursor.execute(save_sql.format(name))
+        try:
+            yield self
+        except BaseException:
+            try:
+                with self.cursor() as cursor:
+                    cursor.execute(rollback_sql.format(name))
+            except Exception as exc:  # pylint: disable=W0718
+                # e.g. sql server has already rolled back the whole transaction;
+                # the error from the block is the one worth raising
+                logger.error("unable to roll back to savepoint %s: %s", name, exc)
+            self.catalog_snapshot = None
+            raise
+        if release_sql:
+            with self.cursor() as cursor:
+                cursor.execute(release_sql.format(name))
+
+    @contextlib.contextmanager
+    def autocommit(self) -> Iterator["MultiDB"]:
+        """
+        context manager which commits each statement executed within it on its
+        own; needed for statements which can't run inside a transaction, e.g.
+        postgres' CREATE INDEX CONCURRENTLY
+        """
+        if self.in_transaction:
+            raise RuntimeError("autocommit cannot be used within a transaction")
+        # the driver won't switch modes with a transaction open
+        self.cnxn.commit()
+        autocommit = getattr(self.cnxn, "autocommit", False)
+        self.cnxn.autocommit = True
+        try:
+            yield self
+        finally:
+            self.cnxn.autocommit = autocommit
 
     def table_info(self, table_name: str) -> Dict[str, ColumnInfo]:
         """
@@ -273,13 +749,71 @@ class MultiDB(contextlib.AbstractContextManager):
             for row in info
         }
 
+    def tables_info(
+        self, schema: str, tables: Optional[Iterable[str]] = None
+    ) -> Dict[Tuple[str, str], Dict[str, ColumnInfo]]:
+        """
+        queries the catalog about the columns of the given tables (by default
+        all of them) in the given schema, max_list_params tables per round
+        trip; returns the column info of each table keyed by (schema, table)
+        """
+        table_names = sorted(
+            set(self.list_tables(schema) if tables is None else tables)
+        )
+        result: Dict[Tuple[str, str], Dict[str, ColumnInfo]] = {}
+        for i in range(0, len(table_names), max_list_params):
+            rows = self.get_rows(
+                self.dialect_sqlfile("tables_info.sql"),
+                schema=schema,
+                tables=table_names[i : i + max_list_params],
+            )
+            for (
+                table,
+                column,
+                position,
+                nullable,
+                data_type,
+                max_len,
+                precision,
+                charset,
+            ) in rows:
+                result.setdefault((schema, table), {})[column] = ColumnInfo(
+                    position=position,
+                    nullable=bool(nullable),
+                    data_type=data_type,
+                    max_len=max_len,
+                    precision=precision,
+                    charset=charset,
+                )
+        if missing := set(table_names) - {table for _, table in result}:
+            raise RuntimeError(
+                f"tables_info couldn't find these tables in {schema}: {sorted(missing)}"
+            )
+        return result
+
+    def catalog(self) -> Dict[str, Set[str]]:
+        """
+        return a snapshot of the schemas in the database and the tables in
+        each of them; the snapshot is loaded with a single query the first
+        time it's needed, and is reloaded after execute runs ddl
+        """
+        if self.catalog_snapshot is None:
+            snapshot: Dict[str, Set[str]] = {}
+            for schema_name, table_name in self.get_rows(sqlfile("catalog.sql")):
+                tables = snapshot.setdefault(schema_name, set())
+                if table_name is not None:
+                    tables.add(table_name)
+            logger.debug("loaded catalog snapshot of %s schemas", len(snapshot))
+            self.catalog_snapshot = snapshot
+        return self.catalog_snapshot
+
     def list_schemas(self) -> List[str]:
         """return a list of schemas in the database"""
-        return self.get_column(sqlfile("list_schemas.sql"))
+        return list(self.catalog())
 
     def list_tables(self, schema: str) -> List[str]:
         """return a list of tables in the given schema"""
-        return self.get_column(sqlfile("list_tables.sql"), schema=schema)
+        return list(self.catalog().get(schema, ()))
 
     @staticmethod
     def sqlfile(filename: str) -> str:
@@ -288,3 +822,42 @@ class MultiDB(contextlib.AbstractContextManager):
         has the given filename
         """
         return sqlfile(filename)
+
+    def dialect_sqlfile(self, filename: str) -> str:
+        """
+        return the contents of the variant of the given sql file which is
+        written for this database's dialect; e.g. for "foo.sql" this reads
+        "foo-postgresql.sql" or "foo-mssql.sql"
+        """
+        stem, _, ext = filename.rpartition(".")
+        return sqlfile(f"{stem}-{dialect_sqlfile_suffix[self.dialect]}.{ext}")
+
+
+def prewarm(*db_params: GlueConfig.MultiDBArgDict):
+    """
+    connect to each of the given databases concurrently and leave the
+    connections idle in the registry, so that startup pays for the slowest
+    connect rather than the sum of them; errors are only logged here, they
+    will come up again when the database is actually used
+    """
+    unique = {
+        (p["dialect"], p["server"], p["user"], p["password"], p["database"]): p
+        for p in db_params
+    }
+
+    def connect(params: GlueConfig.MultiDBArgDict):
+        try:
+            with MultiDB(**params):
+                pass
+        except Exception as exc:  # pylint: disable=W0718
+            logger.warning(
+                "unable to connect to %s/%s: %s",
+                params["server"],
+                params["database"],
+                exc,
+            )
+
+    if not unique:
+        return
+    with ThreadPoolExecutor(max_workers=len(unique)) as pool:
+        list(pool.map(connect, unique.values()))
@@ -0,0 +1,377 @@
+#!/usr/bin/env python3
+"""run multi-statement sql scripts (e.g. webapi's ddl) so they can be resumed"""
+
+import contextlib
+import functools
+import hashlib
+import logging
+import re
+from typing import Any, Dict, FrozenSet, Final, List, NamedTuple, Optional, Set
+
+from ..config import GlueConfig
+from ..scheduler import Task, run_tasks
+from .multidb import MultiDB
+from .utils import ensure_table, execute_ddl
+
+logger = logging.getLogger(__name__)
+
+# the table (in the schema the script targets) which tracks how far along
+# each script is, so that an interrupted run can pick up where it left off
+checkpoint_table: Final = "glue_script_checkpoint"
+
+# the parts of a script which can contain a ; without ending the statement,
+# plus the statement separators themselves (; and sql server's GO lines)
+token_re: Final = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+    | (?P<quoted>'(?:[^']|'')*'|"(?:[^"]|"")*"|\[(?:[^\]]|\]\])*\])
+    | (?P<dollar>\$(?P<tag>[A-Za-z_]\w*)?\$.*?\$(?P=tag)\$)
+    | (?P<go>^[ \t]*GO[ \t]*$)
+    | (?P<open>\b(?:CASE|BEGIN(?!\s*(?:;|TRAN\b|TRANSACTION\b|\Z)))\b)
+    | (?P<close>\bEND\b)
+    | (?P<end>;)
+    """,
+    re.DOTALL | re.IGNORECASE | re.MULTILINE | re.VERBOSE,
+)
+
+comment_re: Final = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+
+# t-sql variables only live until the end of the batch which declared them
+declare_re: Final = re.compile(r"^\s*DECLARE\b", re.IGNORECASE)
+
+# temp tables only live as long as the connection which created them
+temp_create_re: Final = re.compile(
+    r"""
+    \bCREATE\s+(?:(?:GLOBAL|LOCAL)\s+)?TEMP(?:ORARY)?\s+TABLE\s+
+    (?:IF\s+NOT\s+EXISTS\s+)?(?P<pg>[\w"]+)
+    | (?:\bCREATE\s+TABLE|\bINTO)\s+(?P<mssql>\#\w+)
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+temp_drop_re: Final = re.compile(
+    r"\bDROP\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?P<name>[\w\"#]+)", re.IGNORECASE
+)
+
+# a (possibly schema-qualified, possibly quoted) table name
+table_name_pattern: Final = r"(?P<name>(?:[\w\"\[\]#]+\.)*[\w\"\[\]#]+)"
+
+# the tables a statement changes
+write_re: Final = re.compile(
+    r"""
+    \b(?:
+        CREATE\s+(?:UNLOGGED\s+|(?:GLOBAL\s+|LOCAL\s+)?TEMP(?:ORARY)?\s+)?TABLE
+        (?:\s+IF\s+NOT\s+EXISTS)?
+        | CREATE\s+(?:OR\s+REPLACE\s+)?(?:MATERIALIZED\s+)?VIEW
+        | CREATE\s+(?:UNIQUE\s+)?CLUSTERED\s+INDEX\s+\S+\s+ON
+        | INTO | INSERT(?!\s+INTO\b) | MERGE(?:\s+INTO)?
+        | UPDATE(?!\s+(?:STATISTICS|SET|CASCADE|RESTRICT|NO)\b)
+        | DELETE(?!\s+(?:SET|CASCADE|RESTRICT|NO)\b)(?:\s+FROM)?
+        | TRUNCATE(?:\s+TABLE)?
+        | DROP\s+(?:TABLE|VIEW)(?:\s+IF\s+EXISTS)?
+        | ALTER\s+TABLE(?:\s+ONLY)? | CLUSTER
+    )\s+"""
+    + table_name_pattern,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# the tables a foreign key points at
+references_re: Final = re.compile(
+    r"\bREFERENCES\s+" + table_name_pattern, re.IGNORECASE
+)
+
+# the tables a statement only reads; building an index only needs the
+# table's data to be in place, so indexes count as reads (and several
+# indexes on one table can be built at once)
+read_re: Final = re.compile(
+    r"""
+    \b(?:
+        FROM | JOIN | USING | REFERENCES | ANALYZE | UPDATE\s+STATISTICS
+        | INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(?:\S+\s+)?ON
+        (?:\s+ONLY)?
+    )\s+"""
+    + table_name_pattern,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# statements whose effects can't be worked out from their text, so nothing
+# runs alongside them
+barrier_re: Final = re.compile(
+    r"""
+    ^\s*(?:SET|USE|DECLARE|EXEC(?:UTE)?|CALL|DO|COMMIT|ROLLBACK)\b
+    | \bBEGIN\b | \$\w*\$
+    | \bCREATE\s+(?:OR\s+(?:REPLACE|ALTER)\s+)?(?:FUNCTION|PROCEDURE|TRIGGER)\b
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+# statements which change the session, which the other connections wouldn't see
+session_re: Final = re.compile(r"^\s*(?:SET|USE)\b", re.IGNORECASE)
+
+
+class Access(NamedTuple):
+    """the tables a statement (or unit of statements) reads and changes"""
+
+    reads: FrozenSet[str]
+    writes: FrozenSet[str]
+    barrier: bool
+
+
+def split_statements(sql: str) -> List[str]:
+    """
+    split the given script into its statements; a ; only ends a statement
+    when it's outside of quotes, comments, postgres dollar-quoted bodies and
+    t-sql BEGIN ... END blocks, and sql server GO lines end a statement too;
+    from a t-sql DECLARE to the next GO line is kept as one statement, so the
+    variables are still there for the statements which use them; statements
+    which are empty or only comments are dropped
+    """
+    statements: List[str] = []
+    depth = 0
+    start = 0
+    declared = False
+
+    def add(end: int):
+        statement = sql[start:end].strip()
+        if comment_re.sub("", statement).strip():
+            statements.append(statement)
+
+    for match in token_re.finditer(sql):
+        kind = match.lastgroup
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth = max(depth - 1, 0)
+        elif kind == "go":
+            add(match.start())
+            start = match.end()
+            declared = False
+        elif kind == "end" and depth == 0 and not declared:
+            if declare_re.search(comment_re.sub(" ", sql[start : match.start()])):
+                declared = True
+                continue
+            add(match.start())
+            start = match.end()
+    add(len(sql))
+    return statements
+
+
+def checkpoint_units(statements: List[str]) -> List[range]:
+    """
+    group the given statements into the units a checkpoint can fall between;
+    each statement is its own unit unless it creates a temp table, in which
+    case the unit runs until every temp table it has made has been dropped
+    (or to the end of the script), since a resumed run has a new connection
+    which wouldn't have the temp table
+    """
+    units: List[range] = []
+    live: Set[str] = set()
+    start = 0
+    for i, statement in enumerate(statements):
+        for match in temp_create_re.finditer(statement):
+            live.add((match.group("pg") or match.group("mssql")).lower())
+        for match in temp_drop_re.finditer(statement):
+            live.discard(match.group("name").lower())
+        if not live:
+            units.append(range(start, i + 1))
+            start = i + 1
+    if start < len(statements):
+        units.append(range(start, len(statements)))
+    return units
+
+
+def table_key(name: str) -> str:
+    """
+    the name to compare tables by; schemas are ignored, which can only make
+    statements look dependent when they're not, never the other way around
+    """
+    return name.rpartition(".")[2].strip('"[]').lower()
+
+
+def statement_access(statement: str) -> Access:
+    """
+    work out which tables the given statement reads and changes; a statement
+    with nothing recognizable in it is a barrier
+    """
+    text = comment_re.sub(" ", statement)
+    writes = {table_key(match.group("name")) for match in write_re.finditer(text)}
+    reads = {table_key(match.group("name")) for match in read_re.finditer(text)}
+    barrier = bool(barrier_re.search(text)) or not (reads or writes)
+    return Access(frozenset(reads - writes), frozenset(writes), barrier)
+
+
+def foreign_keys(statements: List[str]) -> Dict[str, Set[str]]:
+    """
+    map each table with foreign keys declared in the given statements (in a
+    CREATE TABLE or ALTER TABLE) to the tables they reference
+    """
+    parents: Dict[str, Set[str]] = {}
+    for statement in statements:
+        text = comment_re.sub(" ", statement)
+        referenced = {
+            table_key(match.group("name")) for match in references_re.finditer(text)
+        }
+        if not referenced:
+            continue
+        for match in write_re.finditer(text):
+            table = table_key(match.group("name"))
+            parents.setdefault(table, set()).update(referenced - {table})
+    return parents
+
+
+def unit_dependencies(statements: List[str], units: List[range]) -> List[List[int]]:
+    """
+    for each of the given units of statements, return the (indexes of the)
+    earlier units which have to finish before it can start: those which
+    change a table it uses, or use a table it changes; writing a table with
+    foreign keys (see foreign_keys) uses the tables they reference; a barrier
+    unit waits for everything before it and everything after it waits for the
+    barrier
+    """
+    parents = foreign_keys(statements)
+    dependencies: List[List[int]] = []
+    last_barrier: Optional[int] = None
+    since_barrier: List[int] = []
+    accesses: List[Access] = []
+    for j, unit in enumerate(units):
+        parts = [statement_access(statements[i]) for i in unit]
+        writes = frozenset().union(*(part.writes for part in parts))
+        access = Access(
+            frozenset().union(
+                *(part.reads for part in parts),
+                *(parents.get(table, ()) for table in writes),
+            )
+            - writes,
+            writes,
+            any(part.barrier for part in parts),
+        )
+        accesses.append(access)
+        before = [] if last_barrier is None else [last_barrier]
+        if access.barrier:
+            dependencies.append(before + since_barrier)
+            last_barrier = j
+            since_barrier = []
+            continue
+        dependencies.append(
+            before
+            + [
+                i
+                for i in since_barrier
+                if accesses[i].writes & (access.reads | access.writes)
+                or access.writes & accesses[i].reads
+            ]
+        )
+        since_barrier.append(j)
+    return dependencies
+
+
+def get_checkpoint(db: MultiDB, schema: str, name: str) -> Dict[int, str]:
+    """
+    return the units of the named script which completed before it was
+    interrupted: the index of each unit's first statement, mapped to the
+    sha256 of the script it was part of
+    """
+    if checkpoint_table not in db.list_tables(schema):
+        return {}
+    return dict(
+        db.get_rows(
+            MultiDB.sqlfile("get_script_checkpoint.sql"),
+            ID_schema=schema,
+            script_name=name,
+        )
+    )
+
+
+def run_script(
+    db: MultiDB,
+    schema: str,
+    name: str,
+    sql: str,
+    db_params: Optional[GlueConfig.MultiDBArgDict] = None,
+    workers: int = 1,
+) -> None:
+    """
+    run the given script, with each statement (see checkpoint_units) in a
+    transaction along with a row in the given schema's checkpoint table, so
+    that if the script is interrupted the next run only does what is left;
+    given db_params and more than one worker, statements which don't depend
+    on each other (see unit_dependencies) run concurrently, each on its own
+    connection; the checkpoint is removed once the script finishes; raises a
+    RuntimeError if the script has changed since the interrupted run, since
+    it's then unknown what is left to do
+    """
+    sha256 = hashlib.sha256(sql.encode("utf-8")).hexdigest()
+    statements = split_statements(sql)
+    units = checkpoint_units(statements)
+    ensure_table(db, schema, checkpoint_table, "ddl_script_checkpoint.sql")
+
+    completed = get_checkpoint(db, schema, name)
+    if any(digest != sha256 for digest in completed.values()):
+        raise RuntimeError(
+            f"the {name} script has changed since it was interrupted; finish "
+            f"or undo it by hand, then delete its rows from "
+            f"{schema}.{checkpoint_table}"
+        )
+    if completed:
+        logger.info(
+            "resuming %s; %s of %s step(s) were already done",
+            name,
+            len(completed),
+            len(units),
+        )
+
+    parallel = workers > 1 and db_params is not None
+    if parallel and any(
+        session_re.search(comment_re.sub(" ", statement)) for statement in statements
+    ):
+        logger.info("%s changes session settings; running it sequentially", name)
+        parallel = False
+    if parallel:
+        dependencies = unit_dependencies(statements, units)
+    else:
+        dependencies = [[j - 1] if j else [] for j in range(len(units))]
+
+    def unit_name(unit: range) -> str:
+        if len(unit) == 1:
+            return str(unit.start + 1)
+        return f"{unit.start + 1}-{unit.stop}"
+
+    def run_unit(unit: range, _: Dict[str, Any]):
+        unit_db = (
+            MultiDB(**db_params)
+            if parallel and db_params is not None
+            else contextlib.nullcontext(db)
+        )
+        with unit_db as cnxn_db, cnxn_db.transaction():
+            for i in unit:
+                execute_ddl(cnxn_db, statements[i])
+            cnxn_db.execute(
+                MultiDB.sqlfile("save_script_checkpoint.sql"),
+                ID_schema=schema,
+                script_name=name,
+                statement_index=unit.start,
+                sha256=sha256,
+            )
+
+    run_tasks(
+        [
+            Task(
+                unit_name(unit),
+                functools.partial(run_unit, unit),
+                tuple(
+                    unit_name(units[i])
+                    for i in dependencies[j]
+                    if units[i].start not in completed
+                ),
+            )
+            for j, unit in enumerate(units)
+            if unit.start not in completed
+        ],
+        workers if parallel else 1,
+        label=f"{name} statement",
+    )
+    db.catalog_snapshot = None
+    db.execute(
+        MultiDB.sqlfile("delete_script_checkpoint.sql"),
+        ID_schema=schema,
+        script_name=name,
+    )
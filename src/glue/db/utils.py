@@ -28,6 +28,19 @@ def ensure_table(db: MultiDB, schema: str, table: str, ddl_filename: str) -> Non
         db.execute(MultiDB.sqlfile(ddl_filename), ID_schema=schema, ID_table=table)
 
 
+def execute_ddl(db: MultiDB, sql: str) -> None:
+    """
+    execute the given ddl as-is; unlike MultiDB.execute it isn't treated as a
+    query template, so braces and percent signs in it are left alone
+    """
+    logger.debug("execute_ddl: %s", sql)
+    with db.cursor() as cursor:
+        cursor.execute(sql)
+        if not db.in_transaction:
+            db.cnxn.commit()
+    db.catalog_snapshot = None
+
+
 def clear_table(db, table: str) -> None:
     """truncates the rows in the given table"""
     # execute_sql(cnxn, "truncate table " + table_name)
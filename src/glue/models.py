@@ -34,6 +34,13 @@ class BasicSecurityUserBulkEntry(NamedTuple):
         return cls(**user_dict)
 
 
+class SecUserRoleEntry(NamedTuple):
+    """Represents a row in the role mapping csv file"""
+
+    username: str
+    role: str
+
+
 class CDMSource(NamedTuple):
     """Contains information about a webapi cdm source"""
 
@@ -5,6 +5,7 @@ import logging
 
 from ..config import GlueConfig
 from ..db.multidb import MultiDB
+from ..db.script import run_script
 from ..webapi import WebAPIClient
 
 logger = logging.getLogger(__name__)
@@ -26,5 +27,12 @@ def run(config: GlueConfig, api: WebAPIClient):
         logger.info("starting")
         ddl = api.get_achilles_ddl()
         logger.info("got %s-byte sql blob from webapi. Executing...", len(ddl))
-        cdm_db.execute(ddl)
+        run_script(
+            cdm_db,
+            config.results_schema,
+            "achilles_ddl",
+            ddl,
+            config.cdm_db_params(),
+            config.ddl_workers,
+        )
     logger.info("enable_result_init: done")
@@ -5,6 +5,7 @@ import logging
 
 from ..config import GlueConfig
 from ..db.multidb import MultiDB
+from ..db.script import get_checkpoint, run_script
 from ..db.utils import ensure_schema
 from ..webapi import WebAPIClient
 
@@ -26,13 +27,22 @@ def run(config: GlueConfig, api: WebAPIClient):
         ensure_schema(cdm_db, config.results_schema)
 
         # see if the results.cohort table exists, if so init has already happened
+        # (unless it was interrupted, then it's resumed)
         canary_table = "concept_hierarchy"
-        if canary_table in cdm_db.list_tables(config.results_schema):
+        checkpoint = get_checkpoint(cdm_db, config.results_schema, "results_ddl")
+        if not checkpoint and canary_table in cdm_db.list_tables(config.results_schema):
             logger.info(
                 "found canary table (%s), init has already happened", canary_table
             )
             return
         ddl = api.get_results_ddl()
         logger.info("got %s-byte sql blob from webapi. Executing...", len(ddl))
-        cdm_db.execute(ddl)
+        run_script(
+            cdm_db,
+            config.results_schema,
+            "results_ddl",
+            ddl,
+            config.cdm_db_params(),
+            config.ddl_workers,
+        )
     logger.info("done")
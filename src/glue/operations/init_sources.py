@@ -21,8 +21,10 @@ def run(config: GlueConfig, api: WebAPIClient):
         raise RuntimeError("api.version is required for this operation")
     with MultiDB(**config.app_db_params()) as app_db:
         logger.info("creating webapi source/source_daimon entries in app database...")
-        ensure_webapi_source(config, app_db, api.version)
-        ensure_webapi_source_daimons(config, app_db)
+        # the source and its daimons are committed together
+        with app_db.transaction():
+            ensure_webapi_source(config, app_db, api.version)
+            ensure_webapi_source_daimons(config, app_db)
     logger.info("refreshing webapi sources")
     api.source_refresh()
     logger.info("done")
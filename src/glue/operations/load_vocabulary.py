@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""load the athena vocabulary files from the input dir into the vocab schema"""
+
+import csv
+import datetime
+import decimal
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Final, Iterator, List, Optional, TextIO, Tuple
+
+from ..config import GlueConfig
+from ..db.deferred import defer_ddl, rebuild_ddl
+from ..db.multidb import MultiDB
+from ..db.utils import ensure_schema, ensure_table
+
+logger = logging.getLogger(__name__)
+
+# resources:
+# https://athena.ohdsi.org/vocabulary/list
+# https://ohdsi.github.io/CommonDataModel/cdm54.html#Vocabulary_Tables
+
+# the files in an athena vocabulary download, e.g. CONCEPT.csv, each of which
+# loads into the table with the same (lowercase) name
+VOCABULARY_TABLES: Final = (
+    "CONCEPT",
+    "CONCEPT_ANCESTOR",
+    "CONCEPT_CLASS",
+    "CONCEPT_CPT4",
+    "CONCEPT_RELATIONSHIP",
+    "CONCEPT_SYNONYM",
+    "DOMAIN",
+    "DRUG_STRENGTH",
+    "RELATIONSHIP",
+    "VOCABULARY",
+)
+
+CHECKSUM_TABLE: Final = "glue_vocabulary_load"
+
+# sql server column types which need their csv values converted for the driver
+SQL_SERVER_CONVERTERS: Final[Dict[str, Callable[[str], Any]]] = {
+    "bigint": int,
+    "int": int,
+    "smallint": int,
+    "tinyint": int,
+    "decimal": decimal.Decimal,
+    "numeric": decimal.Decimal,
+    "float": float,
+    "real": float,
+    # athena dates look like 20020731
+    "date": datetime.date.fromisoformat,
+    "datetime": datetime.datetime.fromisoformat,
+    "datetime2": datetime.datetime.fromisoformat,
+}
+
+
+class AthenaDialect(csv.Dialect):
+    """athena vocabulary files are tab-delimited and unquoted"""
+
+    delimiter = "\t"
+    quoting = csv.QUOTE_NONE
+    lineterminator = "\n"
+    strict = True
+
+
+def file_sha256(path: str) -> str:
+    """return the hex sha256 digest of the file at the given path"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while block := fh.read(1 << 20):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_vocabulary_file(
+    fh: TextIO, path: str
+) -> Tuple[List[str], Iterator[List[Any]]]:
+    """
+    return the column names from the header of the given (open) athena file,
+    along with an iterator over its rows; empty fields become None (NULL)
+    """
+    reader = csv.reader(fh, dialect=AthenaDialect)
+    try:
+        columns = [column.strip().lower() for column in next(reader)]
+    except StopIteration:
+        raise RuntimeError(f"{path} is empty") from None
+    rows = ([value if value != "" else None for value in row] for row in reader)
+    return columns, rows
+
+
+def row_converter(
+    db: MultiDB, schema: str, table: str, columns: List[str]
+) -> Optional[Callable[[List[Any]], List[Any]]]:
+    """
+    return a function which converts the text values of a row for the driver,
+    or None if no conversion is needed (postgres' COPY parses text itself)
+    """
+    if db.dialect == "postgresql":
+        return None
+    info = db.tables_info(schema, [table])[(schema, table)]
+    if missing := [column for column in columns if column not in info]:
+        raise RuntimeError(f"{schema}.{table} has no column(s) named {missing}")
+    converters = [
+        SQL_SERVER_CONVERTERS.get(info[column].data_type.lower(), str)
+        for column in columns
+    ]
+    return lambda row: [
+        None if value is None else converter(value)
+        for converter, value in zip(converters, row)
+    ]
+
+
+def is_loaded(config: GlueConfig, table: str, sha256: str) -> bool:
+    """return true if the vocab table was last loaded from a file with this sha256"""
+    with MultiDB(**config.cdm_db_params()) as cdm_db:
+        loaded = cdm_db.get_column(
+            MultiDB.sqlfile("get_vocabulary_checksum.sql"),
+            ID_schema=config.vocab_schema,
+            table_name=table,
+        )
+    return loaded == [sha256]
+
+
+def load_file(config: GlueConfig, table: str, path: str, sha256: str) -> int:
+    """
+    load the given athena file into the given vocab table over its own
+    connection; the truncate, the load, and the checksum update are committed
+    together; returns the number of rows loaded
+    """
+    schema = config.vocab_schema
+    with MultiDB(**config.cdm_db_params()) as cdm_db:
+        if table not in cdm_db.list_tables(schema):
+            raise RuntimeError(f"the table {schema}.{table} does not exist")
+
+        with open(path, "rt", newline="", encoding="utf-8", errors="strict") as fh:
+            columns, rows = read_vocabulary_file(fh, path)
+            if (convert := row_converter(cdm_db, schema, table, columns)) is not None:
+                rows = map(convert, rows)
+            logger.info("loading %s into %s.%s", path, schema, table)
+            with cdm_db.transaction():
+                cdm_db.execute(
+                    MultiDB.sqlfile("truncate_table.sql"),
+                    ID_schema=schema,
+                    ID_table=table,
+                )
+                count = cdm_db.bulk_insert(schema, table, columns, rows)
+                cdm_db.execute(
+                    MultiDB.sqlfile("save_vocabulary_checksum.sql"),
+                    ID_schema=schema,
+                    table_name=table,
+                    sha256=sha256,
+                    row_count=count,
+                )
+    return count
+
+
+def load_files(config: GlueConfig, files: Dict[str, Tuple[str, str]]):
+    """
+    load the given (path, sha256) files into their vocab tables concurrently;
+    raises a RuntimeError naming the tables which failed once the rest are done
+    """
+    # the biggest files go first so they don't end up holding up the finish
+    order = sorted(files, key=lambda table: -os.path.getsize(files[table][0]))
+    failures: Dict[str, BaseException] = {}
+    with ThreadPoolExecutor(max_workers=config.vocabulary_workers) as pool:
+        futures = {
+            table: pool.submit(load_file, config, table, *files[table])
+            for table in order
+        }
+        for table, future in futures.items():
+            if (exc := future.exception()) is not None:
+                logger.error("unable to load %s: %s", files[table][0], exc)
+                failures[table] = exc
+    if failures:
+        raise RuntimeError(
+            f"vocabulary load failed for: {', '.join(sorted(failures))}"
+        ) from next(iter(failures.values()))
+
+
+def run(config: GlueConfig):
+    """load the athena vocabulary files from the input dir into the vocab schema"""
+    files: Dict[str, str] = {}
+    for name in VOCABULARY_TABLES:
+        path = os.path.join(config.input_dir, f"{name}.csv")
+        if os.path.isfile(path):
+            files[name.lower()] = path
+    if not files:
+        logger.warning("no vocabulary files found in %s", config.input_dir)
+        return
+
+    schema = config.vocab_schema
+    logger.info("connecting to CDM database")
+    with MultiDB(**config.cdm_db_params()) as cdm_db:
+        ensure_schema(cdm_db, schema)
+        ensure_table(cdm_db, schema, CHECKSUM_TABLE, "ddl_vocabulary_load.sql")
+    # anything left over from an interrupted load
+    rebuild_ddl(config.cdm_db_params(), schema, config.index_workers)
+
+    with ThreadPoolExecutor(max_workers=config.vocabulary_workers) as pool:
+        checksums = dict(zip(files, pool.map(file_sha256, files.values())))
+    changed: Dict[str, Tuple[str, str]] = {}
+    for table, path in files.items():
+        if is_loaded(config, table, checksums[table]):
+            logger.info("%s is unchanged since it was loaded; skipping", path)
+        else:
+            changed[table] = (path, checksums[table])
+    if not changed:
+        logger.info("done")
+        return
+
+    # a table can't be truncated while foreign keys reference it, so those are
+    # always deferred; the indexes only when asked to
+    with MultiDB(**config.cdm_db_params()) as cdm_db:
+        defer_ddl(
+            cdm_db,
+            schema,
+            changed,
+            config.index_maxdop,
+            indexes=config.vocabulary_defer_indexes,
+        )
+    try:
+        load_files(config, changed)
+    finally:
+        # a failed load is rolled back, so its table is still fit to index
+        rebuild_ddl(config.cdm_db_params(), schema, config.index_workers)
+    logger.info("done")
@@ -2,16 +2,22 @@
 """setup / update the basic security database in the security db"""
 
 import logging
-from typing import Set
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Set
 
 from ..config import GlueConfig
 from ..db.multidb import MultiDB
 from ..db.utils import ensure_schema, ensure_table
+from ..models import BasicSecurityUserBulkEntry
 from ..webapi import WebAPIClient
 from ..webapi_db import (
     bulk_ensure_basic_security_users,
-    ensure_admin_role,
+    bulk_ensure_sec_users,
+    bulk_remove_sec_user_roles,
+    ensure_admin_roles,
     ensure_basic_security_user,
+    estimate_bulk_user_time,
+    sync_sec_user_roles,
 )
 
 logger = logging.getLogger(__name__)
@@ -20,61 +26,129 @@ logger = logging.getLogger(__name__)
 # https://github.com/OHDSI/WebAPI/wiki/Basic-Security-Configuration
 
 
-def run(config: GlueConfig):
-    """setup / update the basic security database in the security db"""
-    # this has to go first, the other methods rely on being able to
-    # communicate with webapi using bearer auth
-    admins: Set[str] = set((config.atlas_username,))
+def init_sec_users(
+    config: GlueConfig, users: Iterable[BasicSecurityUserBulkEntry]
+) -> Dict[str, BaseException]:
+    """
+    sign-in to WebAPI with no-privs as each of the given users, so that WebAPI
+    creates their sec_* table entries; the sign-ins run on a bounded thread
+    pool and failures are collected rather than raised; returns the failures
+    keyed by username
+    """
+
+    def sign_in(user: BasicSecurityUserBulkEntry) -> None:
+        logger.debug(
+            "logging into WebAPI with %s account to init sec tables", user.username
+        )
+        # these sessions are thrown away, so skip the /info request
+        WebAPIClient(config, user.username, user.password, fetch_info=False)
+
+    failures: Dict[str, BaseException] = {}
+    with ThreadPoolExecutor(max_workers=config.webapi_login_workers) as pool:
+        futures = {user.username: pool.submit(sign_in, user) for user in users}
+        for username, future in futures.items():
+            if (exc := future.exception()) is not None:
+                logger.error("unable to sign-in to WebAPI as %s: %s", username, exc)
+                failures[username] = exc
+    return failures
+
+
+def ensure_atlas_admin(config: GlueConfig):
+    """
+    ensure the basic security schema and users table exist in the security db
+    and that the atlas admin account is in it; this has to go first, the other
+    operations rely on being able to communicate with webapi using bearer auth
+    """
     logger.info("connecting to security database")
     with MultiDB(**config.security_db_params()) as security_db:
         logger.info("ensuring the basic security schema is setup")
+        with security_db.transaction():
+            # ensure the schema exists
+            ensure_schema(security_db, config.security_schema)
 
-        # ensure the schema exists
-        ensure_schema(security_db, config.security_schema)
+            # ensure the users table exists
+            ensure_table(
+                security_db,
+                config.security_schema,
+                "users",
+                "ddl_basic_security_users.sql",
+            )
 
-        # ensure the users table exists
-        ensure_table(
-            security_db,
-            config.security_schema,
-            "users",
-            "ddl_basic_security_users.sql",
-        )
+            # ensure the atlas user exists in the users table
+            ensure_basic_security_user(
+                config,
+                security_db,
+                config.atlas_username,
+                config.atlas_password,
+            )
+    logger.info("done")
 
-        # ensure the atlas user exists in the users table
-        ensure_basic_security_user(
-            config,
-            security_db,
-            config.atlas_username,
-            config.atlas_password,
-        )
 
-        # if we were given a bulk user CSV file, we create/update/delete those users
-        if config.bulk_user_file:
-            logger.info("handling bulk user accounts from %s", config.bulk_user_file)
+def ensure_users(config: GlueConfig, api: WebAPIClient):
+    """
+    create/update/delete the bulk user accounts and set up the webapi sec_*
+    entries and role memberships for them and the atlas admin account; this
+    needs the atlas admin account to have signed-in to webapi (as api) already
+    """
+    admins: Set[str] = set((config.atlas_username,))
+    new_users: List[BasicSecurityUserBulkEntry] = []
+    deleted_users: List[str] = []
+
+    # if we were given a bulk user CSV file, we create/update/delete those users
+    if config.bulk_user_file:
+        logger.info("handling bulk user accounts from %s", config.bulk_user_file)
+        estimate_bulk_user_time(config)
+        with MultiDB(**config.security_db_params()) as security_db:
             bulk_results = bulk_ensure_basic_security_users(config, security_db)
-            for user, status in bulk_results.items():
-                if status in ("CREATED", "UPDATED"):
-                    # sign-in with no-privs to init the sec_* tables entries
-                    logger.debug(
-                        "logging into WebAPI with %s account to init sec tables",
-                        user.username,
-                    )
-                    _ = WebAPIClient(config, user.username, user.password)
-                if status not in ("DELETED", "ERROR"):
-                    # later we will ensure these accounts have the admin role
-                    admins.add(user.username)
+        # these accounts need sec_* table entries in the app db
+        new_users = bulk_results.changed
+        for username, status in bulk_results.statuses.items():
+            if status == "DELETED":
+                # these accounts need their sec_* role entries removed
+                deleted_users.append(username)
+            if status not in ("DELETED", "ERROR") and not config.role_mapping_file:
+                # later we will ensure these accounts have the admin role
+                admins.add(username)
+
+    if new_users and not config.provision_sec_users:
+        # sign-in as each new user so webapi creates their sec_* entries itself
+        # (over its own connection, so this stays outside our transaction)
+        failures = init_sec_users(config, new_users)
+        if failures:
+            logger.warning(
+                "%s bulk user(s) could not sign-in to WebAPI: %s",
+                len(failures),
+                ", ".join(sorted(failures)),
+            )
+
+    # now augment the sec_* entries, committing all of the changes together
+    with MultiDB(**config.app_db_params()) as app_db, app_db.transaction():
+        if new_users and config.provision_sec_users:
+            if api.version is None:
+                raise RuntimeError("api.version is required to provision sec users")
+            bulk_ensure_sec_users(config, app_db, new_users, api.version)
+        if deleted_users:
+            bulk_remove_sec_user_roles(config, app_db, deleted_users)
+        logger.debug("ensuring admin role for %s user(s)", len(admins))
+        ensure_admin_roles(config, app_db, admins)
+
+        # if we were given a role mapping CSV file, we sync those memberships
+        if config.role_mapping_file:
+            logger.info("syncing role memberships from %s", config.role_mapping_file)
+            sync_sec_user_roles(config, app_db)
+
+    logger.info("done")
+
+
+def run(config: GlueConfig):
+    """setup / update the basic security database in the security db"""
+    ensure_atlas_admin(config)
 
     # sign-in with no-privs to init the sec_* tables entries
     logger.debug(
         "logging into WebAPI with %s account to init sec tables",
         config.atlas_username,
     )
-    _ = WebAPIClient(config)
-
-    # now augment those entries...
-    with MultiDB(**config.app_db_params()) as app_db:
-        for username in admins:
-            logger.debug("ensuring admin role for %s", username)
-            ensure_admin_role(config, app_db, username)
+    api = WebAPIClient(config)
 
-    logger.info("done")
+    ensure_users(config, api)
@@ -3,41 +3,142 @@
 
 # pylint: disable=R0913
 import logging
-from typing import Any
+from typing import Any, List, Tuple
 
 from . import webapi
 from .config import GlueConfig
+from .db.multidb import compile_query, connection_registry, prewarm
 from .operations import (
     init_cem_results_schema,
     init_concept_count,
     init_results_schema,
     init_sources,
+    load_vocabulary,
     set_basic_security,
 )
+from .scheduler import Task, run_tasks
 
 logger = logging.getLogger(__name__)
 
 
-def glue_it(config: GlueConfig) -> Any:
+def webapi_login(config: GlueConfig) -> webapi.WebAPIClient:
     """
-    connect to the database, create the results schema, tell webapi how to connect to
-    the cdm source
+    sign-in to webapi as the atlas admin and start fetching the ddl which the
+    enabled operations will need
+    """
+    api = webapi.WebAPIClient(config)
+    ddl_methods = []
+    if config.enable_result_init:
+        ddl_methods.append("get_results_ddl")
+    if config.enable_cem_results_init:
+        ddl_methods.append("get_cem_results_ddl")
+    if config.enable_concept_count_init and api.version and api.version >= "2.13.0":
+        ddl_methods.append("get_achilles_ddl")
+    api.prefetch(*ddl_methods)
+    return api
+
+
+def glue_tasks(config: GlueConfig) -> List[Task]:
     """
+    return the enabled operations as tasks, along with what each of them
+    depends on
+    """
+    tasks: List[Task] = []
+    login_depends: Tuple[str, ...] = ()
     if config.enable_basic_security:
-        set_basic_security.run(config)
+        # the atlas admin account has to exist before anything can sign-in
+        tasks.append(
+            Task("atlas_admin", lambda _: set_basic_security.ensure_atlas_admin(config))
+        )
+        login_depends = ("atlas_admin",)
 
-    api = webapi.WebAPIClient(config)
+    tasks.append(Task("webapi_login", lambda _: webapi_login(config), login_depends))
 
+    if config.enable_basic_security:
+        tasks.append(
+            Task(
+                "users",
+                lambda done: set_basic_security.ensure_users(
+                    config, done["webapi_login"]
+                ),
+                ("webapi_login",),
+            )
+        )
+
+    # the results schema (its concept hierarchy) and the concept counts are
+    # built from the vocabulary
+    after_vocabulary: Tuple[str, ...] = ("webapi_login",)
+    if config.enable_vocabulary_load:
+        tasks.append(Task("vocabulary", lambda _: load_vocabulary.run(config)))
+        after_vocabulary += ("vocabulary",)
+
+    # the concept count tables and the webapi sources are built on top of
+    # the results schema
+    after_results = after_vocabulary
     if config.enable_result_init:
-        init_results_schema.run(config, api)
+        tasks.append(
+            Task(
+                "results_schema",
+                lambda done: init_results_schema.run(config, done["webapi_login"]),
+                after_vocabulary,
+            )
+        )
+        after_results += ("results_schema",)
 
     if config.enable_cem_results_init:
-        init_cem_results_schema.run(config, api)
+        tasks.append(
+            Task(
+                "cem_results_schema",
+                lambda done: init_cem_results_schema.run(config, done["webapi_login"]),
+                ("webapi_login",),
+            )
+        )
 
     if config.enable_concept_count_init:
-        init_concept_count.run(config, api)
+        tasks.append(
+            Task(
+                "concept_count",
+                lambda done: init_concept_count.run(config, done["webapi_login"]),
+                after_results,
+            )
+        )
 
     if config.enable_source_setup:
-        init_sources.run(config, api)
+        tasks.append(
+            Task(
+                "sources",
+                lambda done: init_sources.run(config, done["webapi_login"]),
+                after_results,
+            )
+        )
+
+    return tasks
+
+
+def glue_it(config: GlueConfig) -> Any:
+    """
+    connect to the database, create the results schema, tell webapi how to connect to
+    the cdm source
+    """
+    try:
+        db_params = []
+        if config.enable_basic_security:
+            db_params += [config.security_db_params(), config.app_db_params()]
+        if (
+            config.enable_vocabulary_load
+            or config.enable_result_init
+            or config.enable_cem_results_init
+            or config.enable_concept_count_init
+        ):
+            db_params.append(config.cdm_db_params())
+        if config.enable_source_setup:
+            db_params.append(config.app_db_params())
+        prewarm(*db_params)
+
+        run_tasks(glue_tasks(config), config.operation_workers)
+    finally:
+        # the operations share database connections through the registry
+        connection_registry.close_all()
+        logger.debug("compiled query cache: %s", compile_query.cache_info())
 
     logger.info("done")
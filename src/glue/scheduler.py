@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""run operations concurrently, in an order given by their dependencies"""
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Task(NamedTuple):
+    """
+    an operation to run; func is given the results of the tasks it depends
+    on, keyed by task name
+    """
+
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    depends: Tuple[str, ...] = ()
+
+
+def run_tasks(
+    tasks: Iterable[Task], workers: int, label: str = "operation"
+) -> Dict[str, Any]:
+    """
+    run the given tasks on a pool of the given number of worker threads; each
+    task starts as soon as all of its dependencies have finished, so the total
+    run time is that of the longest chain of dependencies rather than the sum
+    of all the tasks; a failed task doesn't stop the tasks which don't depend
+    on it, but once everything else is done a RuntimeError is raised naming
+    the failed tasks (and the ones skipped because of them); returns the task
+    results keyed by task name; label is what the tasks are called in the logs
+    """
+    pending: Dict[str, Task] = {}
+    for task in tasks:
+        if task.name in pending:
+            raise RuntimeError(f"duplicate task name: {task.name}")
+        pending[task.name] = task
+    for task in pending.values():
+        if unknown := set(task.depends) - set(pending):
+            raise RuntimeError(
+                f"task {task.name} depends on unknown task(s): {unknown}"
+            )
+
+    results: Dict[str, Any] = {}
+    failed: Dict[str, BaseException] = {}
+    skipped: Dict[str, str] = {}
+    timings: Dict[str, float] = {}
+    running: Dict[Future, str] = {}
+
+    def timed(task: Task) -> Any:
+        start = time.perf_counter()
+        try:
+            return task.func({name: results[name] for name in task.depends})
+        finally:
+            timings[task.name] = time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        while pending or running:
+            # skip the tasks whose dependencies have failed (repeated, since
+            # skipping one task can mean skipping the tasks after it)
+            while blocked := {
+                name: dep
+                for name, task in pending.items()
+                for dep in task.depends
+                if dep in failed or dep in skipped
+            }:
+                for name, dep in blocked.items():
+                    logger.error("skipping %s %s because %s failed", label, name, dep)
+                    skipped[name] = dep
+                    del pending[name]
+
+            for name, task in list(pending.items()):
+                if all(dep in results for dep in task.depends):
+                    logger.info("starting %s %s", label, name)
+                    running[pool.submit(timed, task)] = name
+                    del pending[name]
+
+            if not running:
+                if pending:
+                    raise RuntimeError(
+                        f"task dependencies cannot be satisfied: {sorted(pending)}"
+                    )
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if (exc := future.exception()) is not None:
+                    logger.error("%s %s failed: %s", label, name, exc, exc_info=exc)
+                    failed[name] = exc
+                else:
+                    logger.info("%s %s finished in %.1fs", label, name, timings[name])
+                    results[name] = future.result()
+
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        logger.debug("%s %s took %.1fs", label, name, seconds)
+
+    if failed:
+        raise RuntimeError(
+            f"{label}(s) failed: {', '.join(failed)}"
+            + (f"; skipped: {', '.join(skipped)}" if skipped else "")
+        ) from next(iter(failed.values()))
+    return results
@@ -7,4 +7,4 @@ INSERT INTO {ID_schema}.sec_user_role (
   FROM
     {ID_schema}.sec_user
   WHERE
-    login = {login});
+    login IN ({logins}));
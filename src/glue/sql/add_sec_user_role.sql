@@ -0,0 +1,6 @@
+INSERT INTO {ID_schema}.sec_user_role (
+  user_id,
+  role_id)
+VALUES (
+  {user_id},
+  {role_id});
@@ -0,0 +1,6 @@
+SELECT
+  s.schema_name,
+  t.table_name
+FROM
+  information_schema.schemata AS s
+  LEFT JOIN information_schema.tables AS t ON t.table_schema = s.schema_name;
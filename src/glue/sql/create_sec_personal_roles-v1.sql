@@ -0,0 +1,16 @@
+INSERT INTO {ID_schema}.sec_role (
+  id,
+  name)
+SELECT
+  NEXTVAL('{ID_schema}.sec_role_sequence'),
+  staged.login
+FROM
+  glue_sec_user_staging AS staged
+WHERE
+  NOT EXISTS (
+    SELECT
+      1
+    FROM
+      {ID_schema}.sec_role AS sec_role
+    WHERE
+      sec_role.name = staged.login);
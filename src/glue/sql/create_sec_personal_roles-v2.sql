@@ -0,0 +1,19 @@
+INSERT INTO {ID_schema}.sec_role (
+  id,
+  name,
+  system_role)
+SELECT
+  NEXTVAL('{ID_schema}.sec_role_sequence'),
+  staged.login,
+  FALSE
+FROM
+  glue_sec_user_staging AS staged
+WHERE
+  NOT EXISTS (
+    SELECT
+      1
+    FROM
+      {ID_schema}.sec_role AS sec_role
+    WHERE
+      sec_role.name = staged.login
+      AND sec_role.system_role = FALSE);
@@ -0,0 +1,21 @@
+INSERT INTO {ID_schema}.sec_user_role (
+  user_id,
+  role_id)
+SELECT
+  sec_user.id,
+  sec_role.id
+FROM
+  glue_sec_user_staging AS staged
+  JOIN {ID_schema}.sec_user AS sec_user ON sec_user.login = staged.login
+  JOIN {ID_schema}.sec_role AS sec_role ON (sec_role.name = staged.login
+      AND sec_role.system_role = FALSE)
+    OR sec_role.name = {default_role}
+WHERE
+  NOT EXISTS (
+    SELECT
+      1
+    FROM
+      {ID_schema}.sec_user_role AS sec_user_role
+    WHERE
+      sec_user_role.user_id = sec_user.id
+      AND sec_user_role.role_id = sec_role.id);
@@ -0,0 +1,5 @@
+CREATE TEMPORARY TABLE glue_sec_user_staging (
+  login VARCHAR(1024) NOT NULL,
+  name VARCHAR(1024),
+  PRIMARY KEY (login)
+) ON COMMIT DROP;
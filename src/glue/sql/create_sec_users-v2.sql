@@ -0,0 +1,20 @@
+INSERT INTO {ID_schema}.sec_user (
+  id,
+  login,
+  name,
+  origin)
+SELECT
+  NEXTVAL('{ID_schema}.sec_user_sequence'),
+  staged.login,
+  staged.name,
+  'SYSTEM'
+FROM
+  glue_sec_user_staging AS staged
+WHERE
+  NOT EXISTS (
+    SELECT
+      1
+    FROM
+      {ID_schema}.sec_user AS sec_user
+    WHERE
+      sec_user.login = staged.login);
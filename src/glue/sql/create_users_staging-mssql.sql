@@ -0,0 +1,10 @@
+DROP TABLE IF EXISTS #glue_users_staging;
+
+CREATE TABLE #glue_users_staging (
+  username VARCHAR(255) NOT NULL,
+  password_hash VARCHAR(255) NOT NULL,
+  firstname VARCHAR(255),
+  middlename VARCHAR(255),
+  lastname VARCHAR(255),
+  PRIMARY KEY (username)
+);
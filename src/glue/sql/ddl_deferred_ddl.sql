@@ -0,0 +1,8 @@
+CREATE TABLE {ID_schema}.{ID_table} (
+  kind VARCHAR(16) NOT NULL,
+  table_name VARCHAR(255) NOT NULL,
+  object_name VARCHAR(255) NOT NULL,
+  drop_sql VARCHAR(4000) NOT NULL,
+  rebuild_sql VARCHAR(4000) NOT NULL,
+  PRIMARY KEY (kind, table_name, object_name)
+);
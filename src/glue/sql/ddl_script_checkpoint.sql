@@ -0,0 +1,6 @@
+CREATE TABLE {ID_schema}.{ID_table} (
+  script_name VARCHAR(255) NOT NULL,
+  statement_index INTEGER NOT NULL,
+  sha256 CHAR(64) NOT NULL,
+  PRIMARY KEY (script_name, statement_index)
+);
@@ -0,0 +1,6 @@
+CREATE TABLE {ID_schema}.{ID_table} (
+  table_name VARCHAR(255) NOT NULL,
+  sha256 CHAR(64) NOT NULL,
+  row_count BIGINT NOT NULL,
+  PRIMARY KEY (table_name)
+);
@@ -0,0 +1,4 @@
+DELETE FROM {ID_schema}.glue_deferred_ddl
+WHERE kind = {kind}
+  AND table_name = {table_name}
+  AND object_name = {object_name};
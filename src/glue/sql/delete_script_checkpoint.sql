@@ -0,0 +1,2 @@
+DELETE FROM {ID_schema}.glue_script_checkpoint
+WHERE script_name = {script_name};
@@ -0,0 +1,8 @@
+DELETE FROM {ID_schema}.sec_user_role
+WHERE user_id IN (
+    SELECT
+      id
+    FROM
+      {ID_schema}.sec_user
+    WHERE
+      login IN ({logins}));
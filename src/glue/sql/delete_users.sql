@@ -0,0 +1,2 @@
+DELETE FROM {ID_schema}.users
+WHERE username IN ({usernames});
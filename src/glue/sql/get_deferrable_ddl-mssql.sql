@@ -0,0 +1,66 @@
+SELECT
+  'index' AS kind,
+  t.name AS table_name,
+  i.name AS object_name,
+  'ALTER INDEX ' + QUOTENAME(i.name) + ' ON ' + QUOTENAME(s.name) + '.' + QUOTENAME(t.name) + ' DISABLE' AS drop_sql,
+  'ALTER INDEX ' + QUOTENAME(i.name) + ' ON ' + QUOTENAME(s.name) + '.' + QUOTENAME(t.name) + ' REBUILD WITH (ONLINE = ON, MAXDOP = {LIT_maxdop})' AS rebuild_sql
+FROM
+  sys.indexes AS i
+  JOIN sys.tables AS t ON t.object_id = i.object_id
+  JOIN sys.schemas AS s ON s.schema_id = t.schema_id
+WHERE
+  s.name = {schema}
+  AND t.name IN ({tables})
+  AND i.type = 2
+  AND i.is_primary_key = 0
+  AND i.is_unique_constraint = 0
+UNION
+SELECT
+  'foreign key' AS kind,
+  CASE WHEN ps.name = {schema} THEN
+    pt.name
+  ELSE
+    ps.name + '.' + pt.name
+  END AS table_name,
+  fk.name AS object_name,
+  'ALTER TABLE ' + QUOTENAME(ps.name) + '.' + QUOTENAME(pt.name) + ' DROP CONSTRAINT IF EXISTS ' + QUOTENAME(fk.name) AS drop_sql,
+  'ALTER TABLE ' + QUOTENAME(ps.name) + '.' + QUOTENAME(pt.name) + CASE WHEN fk.is_not_trusted = 1
+    OR ps.name <> {schema} THEN
+    ' WITH NOCHECK'
+  ELSE
+    ' WITH CHECK'
+  END + ' ADD CONSTRAINT ' + QUOTENAME(fk.name) + ' FOREIGN KEY (' + (
+    SELECT
+      STRING_AGG(QUOTENAME(c.name), ', ') WITHIN GROUP (ORDER BY fkc.constraint_column_id)
+    FROM
+      sys.foreign_key_columns AS fkc
+      JOIN sys.columns AS c ON c.object_id = fkc.parent_object_id
+        AND c.column_id = fkc.parent_column_id
+    WHERE
+      fkc.constraint_object_id = fk.object_id) + ') REFERENCES ' + QUOTENAME(rs.name) + '.' + QUOTENAME(rt.name) + ' (' + (
+    SELECT
+      STRING_AGG(QUOTENAME(c.name), ', ') WITHIN GROUP (ORDER BY fkc.constraint_column_id)
+    FROM
+      sys.foreign_key_columns AS fkc
+      JOIN sys.columns AS c ON c.object_id = fkc.referenced_object_id
+        AND c.column_id = fkc.referenced_column_id
+    WHERE
+      fkc.constraint_object_id = fk.object_id) + ') ON DELETE ' + REPLACE(fk.delete_referential_action_desc, '_', ' ') + ' ON UPDATE ' + REPLACE(fk.update_referential_action_desc, '_', ' ') + CASE WHEN fk.is_not_for_replication = 1 THEN
+    ' NOT FOR REPLICATION'
+  ELSE
+    ''
+  END + CASE WHEN fk.is_disabled = 1 THEN
+    '; ALTER TABLE ' + QUOTENAME(ps.name) + '.' + QUOTENAME(pt.name) + ' NOCHECK CONSTRAINT ' + QUOTENAME(fk.name)
+  ELSE
+    ''
+  END AS rebuild_sql
+FROM
+  sys.foreign_keys AS fk
+  JOIN sys.tables AS pt ON pt.object_id = fk.parent_object_id
+  JOIN sys.schemas AS ps ON ps.schema_id = pt.schema_id
+  JOIN sys.tables AS rt ON rt.object_id = fk.referenced_object_id
+  JOIN sys.schemas AS rs ON rs.schema_id = rt.schema_id
+WHERE (rs.name = {schema}
+  AND rt.name IN ({tables}))
+  OR (ps.name = {schema}
+    AND pt.name IN ({tables}));
@@ -0,0 +1,47 @@
+SELECT
+  'index' AS kind,
+  t.relname AS table_name,
+  i.relname AS object_name,
+  'DROP INDEX IF EXISTS ' || quote_ident(n.nspname) || '.' || quote_ident(i.relname) AS drop_sql,
+  regexp_replace(pg_get_indexdef(i.oid), '^CREATE (UNIQUE )?INDEX ', 'CREATE \1INDEX CONCURRENTLY ') AS rebuild_sql
+FROM
+  pg_catalog.pg_index AS x
+  JOIN pg_catalog.pg_class AS i ON i.oid = x.indexrelid
+  JOIN pg_catalog.pg_class AS t ON t.oid = x.indrelid
+  JOIN pg_catalog.pg_namespace AS n ON n.oid = t.relnamespace
+WHERE
+  n.nspname = {schema}
+  AND t.relname IN ({tables})
+  AND NOT EXISTS (
+    SELECT
+      1
+    FROM
+      pg_catalog.pg_constraint AS c
+    WHERE
+      c.conindid = x.indexrelid
+      AND c.contype IN ('p', 'u', 'x'))
+UNION
+SELECT
+  'foreign key' AS kind,
+  CASE WHEN cn.nspname = {schema} THEN
+    ct.relname
+  ELSE
+    cn.nspname || '.' || ct.relname
+  END AS table_name,
+  c.conname AS object_name,
+  'ALTER TABLE ' || quote_ident(cn.nspname) || '.' || quote_ident(ct.relname) || ' DROP CONSTRAINT IF EXISTS ' || quote_ident(c.conname) AS drop_sql,
+  'ALTER TABLE ' || quote_ident(cn.nspname) || '.' || quote_ident(ct.relname) || ' ADD CONSTRAINT ' || quote_ident(c.conname) || ' ' || pg_get_constraintdef(c.oid) || CASE WHEN cn.nspname <> {schema} AND c.convalidated THEN
+    ' NOT VALID'
+  ELSE
+    ''
+  END AS rebuild_sql
+FROM
+  pg_catalog.pg_constraint AS c
+  JOIN pg_catalog.pg_class AS ct ON ct.oid = c.conrelid
+  JOIN pg_catalog.pg_namespace AS cn ON cn.oid = ct.relnamespace
+  JOIN pg_catalog.pg_class AS t ON t.oid IN (c.conrelid, c.confrelid)
+  JOIN pg_catalog.pg_namespace AS n ON n.oid = t.relnamespace
+WHERE
+  c.contype = 'f'
+  AND n.nspname = {schema}
+  AND t.relname IN ({tables});
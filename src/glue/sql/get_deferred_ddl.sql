@@ -0,0 +1,8 @@
+SELECT
+  kind,
+  table_name,
+  object_name,
+  drop_sql,
+  rebuild_sql
+FROM
+  {ID_schema}.glue_deferred_ddl;
@@ -0,0 +1,7 @@
+SELECT
+  sec_user.login
+FROM
+  {ID_schema}.sec_user
+  JOIN {ID_schema}.sec_user_role ON {ID_schema}.sec_user.id = {ID_schema}.sec_user_role.user_id
+WHERE
+  {ID_schema}.sec_user_role.role_id = {role_id};
@@ -0,0 +1,7 @@
+SELECT
+  statement_index,
+  sha256
+FROM
+  {ID_schema}.glue_script_checkpoint
+WHERE
+  script_name = {script_name};
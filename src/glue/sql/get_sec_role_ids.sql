@@ -0,0 +1,5 @@
+SELECT
+  name,
+  id
+FROM
+  {ID_schema}.sec_role;
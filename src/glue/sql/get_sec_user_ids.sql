@@ -0,0 +1,5 @@
+SELECT
+  login,
+  id
+FROM
+  {ID_schema}.sec_user;
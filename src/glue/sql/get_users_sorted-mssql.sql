@@ -0,0 +1,10 @@
+SELECT
+  username,
+  password_hash,
+  firstname,
+  middlename,
+  lastname
+FROM
+  {ID_schema}.users
+ORDER BY
+  CAST(username AS NVARCHAR(255)) COLLATE Latin1_General_100_BIN2;
@@ -0,0 +1,10 @@
+SELECT
+  username,
+  password_hash,
+  firstname,
+  middlename,
+  lastname
+FROM
+  {ID_schema}.users
+ORDER BY
+  username COLLATE "C";
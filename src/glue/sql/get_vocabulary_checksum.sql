@@ -0,0 +1,6 @@
+SELECT
+  sha256
+FROM
+  {ID_schema}.glue_vocabulary_load
+WHERE
+  table_name = {table_name};
@@ -0,0 +1,22 @@
+INSERT INTO {ID_schema}.users (
+  username,
+  password_hash,
+  firstname,
+  middlename,
+  lastname)
+SELECT
+  staged.username,
+  staged.password_hash,
+  staged.firstname,
+  staged.middlename,
+  staged.lastname
+FROM
+  #glue_users_staging AS staged
+WHERE
+  NOT EXISTS (
+    SELECT
+      1
+    FROM
+      {ID_schema}.users AS users
+    WHERE
+      users.username = staged.username);
@@ -1,4 +0,0 @@
-SELECT
-  schema_name
-FROM
-  information_schema.schemata;
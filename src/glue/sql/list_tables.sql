@@ -1,6 +0,0 @@
-SELECT
-  table_name
-FROM
-  information_schema.tables
-WHERE
-  table_schema = {schema};
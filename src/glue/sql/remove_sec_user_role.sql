@@ -0,0 +1,3 @@
+DELETE FROM {ID_schema}.sec_user_role
+WHERE user_id = {user_id}
+  AND role_id = {role_id};
@@ -0,0 +1,12 @@
+INSERT INTO {ID_schema}.glue_deferred_ddl (
+  kind,
+  table_name,
+  object_name,
+  drop_sql,
+  rebuild_sql)
+VALUES (
+  {kind},
+  {table_name},
+  {object_name},
+  {drop_sql},
+  {rebuild_sql});
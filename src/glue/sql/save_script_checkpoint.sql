@@ -0,0 +1,8 @@
+INSERT INTO {ID_schema}.glue_script_checkpoint (
+  script_name,
+  statement_index,
+  sha256)
+VALUES (
+  {script_name},
+  {statement_index},
+  {sha256});
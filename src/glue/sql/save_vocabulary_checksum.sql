@@ -0,0 +1,11 @@
+DELETE FROM {ID_schema}.glue_vocabulary_load
+WHERE table_name = {table_name};
+
+INSERT INTO {ID_schema}.glue_vocabulary_load (
+  table_name,
+  sha256,
+  row_count)
+VALUES (
+  {table_name},
+  {sha256},
+  {row_count});
@@ -0,0 +1,6 @@
+INSERT INTO glue_sec_user_staging (
+  login,
+  name)
+VALUES (
+  {login},
+  {name});
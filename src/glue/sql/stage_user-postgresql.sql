@@ -0,0 +1,12 @@
+INSERT INTO glue_users_staging (
+  username,
+  password_hash,
+  firstname,
+  middlename,
+  lastname)
+VALUES (
+  {username},
+  {password_hash},
+  {firstname},
+  {middlename},
+  {lastname});
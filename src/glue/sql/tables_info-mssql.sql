@@ -0,0 +1,21 @@
+SELECT
+  TABLE_NAME,
+  COLUMN_NAME,
+  ORDINAL_POSITION,
+  CASE WHEN IS_NULLABLE = 'YES' THEN
+    1
+  ELSE
+    0
+  END AS IS_NULLABLE,
+  DATA_TYPE,
+  CHARACTER_MAXIMUM_LENGTH,
+  NUMERIC_PRECISION,
+  CHARACTER_SET_NAME
+FROM
+  INFORMATION_SCHEMA.COLUMNS
+WHERE
+  TABLE_SCHEMA = {schema}
+  AND TABLE_NAME IN ({tables})
+ORDER BY
+  TABLE_NAME,
+  ORDINAL_POSITION;
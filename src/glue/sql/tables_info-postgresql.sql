@@ -0,0 +1,31 @@
+SELECT
+  c.relname AS table_name,
+  a.attname AS column_name,
+  a.attnum AS ordinal_position,
+  NOT (a.attnotnull OR (t.typtype = 'd' AND t.typnotnull)) AS is_nullable,
+  CASE WHEN bt.typelem <> 0 AND bt.typlen = -1 THEN
+    'ARRAY'
+  WHEN bn.nspname = 'pg_catalog' THEN
+    format_type(bt.oid, NULL)
+  ELSE
+    'USER-DEFINED'
+  END AS data_type,
+  information_schema._pg_char_max_length(bt.oid, information_schema._pg_truetypmod(a.*, t.*)) AS character_maximum_length,
+  information_schema._pg_numeric_precision(bt.oid, information_schema._pg_truetypmod(a.*, t.*)) AS numeric_precision,
+  NULL AS character_set_name
+FROM
+  pg_catalog.pg_attribute AS a
+  JOIN pg_catalog.pg_class AS c ON c.oid = a.attrelid
+  JOIN pg_catalog.pg_namespace AS n ON n.oid = c.relnamespace
+  JOIN pg_catalog.pg_type AS t ON t.oid = a.atttypid
+  JOIN pg_catalog.pg_type AS bt ON bt.oid = information_schema._pg_truetypid(a.*, t.*)
+  JOIN pg_catalog.pg_namespace AS bn ON bn.oid = bt.typnamespace
+WHERE
+  n.nspname = {schema}
+  AND c.relname IN ({tables})
+  AND c.relkind IN ('r', 'v', 'm', 'f', 'p')
+  AND a.attnum > 0
+  AND NOT a.attisdropped
+ORDER BY
+  c.relname,
+  a.attnum;
@@ -0,0 +1 @@
+TRUNCATE TABLE {ID_schema}.{ID_table};
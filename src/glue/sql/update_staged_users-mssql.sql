@@ -0,0 +1,7 @@
+UPDATE
+  users
+SET
+  password_hash = staged.password_hash
+FROM
+  {ID_schema}.users AS users
+  JOIN #glue_users_staging AS staged ON users.username = staged.username;
@@ -0,0 +1,8 @@
+UPDATE
+  {ID_schema}.users AS users
+SET
+  password_hash = staged.password_hash
+FROM
+  glue_users_staging AS staged
+WHERE
+  users.username = staged.username;
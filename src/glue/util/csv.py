@@ -1,18 +1,162 @@
 """helpers related to files in csv format"""
 
 import csv
+import heapq
+import itertools
 import logging
-import re
-from typing import List, NamedTuple, Type, TypeVar
+import operator
+import os
+import pickle
+import tempfile
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Final,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T", bound=NamedTuple)
 
+# how many rows iter_typed_csv yields at a time
+default_chunk_size: Final = 10000
+
+# how many sorted runs sorted_typed_csv merges (so has open) at a time
+max_open_runs: Final = 64
+
+
+class CsvStats:
+    """counts of the rows read from a csv file, and of the rows skipped"""
+
+    def __init__(self):
+        self.rows = 0
+        self.skipped = 0
+
 
 def is_empty(data: str) -> bool:
     """return true if the given data is empty or purely whitespace"""
-    return bool(re.match(r"^\s*$", data))
+    return not data or data.isspace()
+
+
+def row_builder(rowclass: Type[T]) -> Callable[[List[str]], T]:
+    """
+    return a function which converts a list of csv fields into an instance of
+    the given named tuple class, using the class annotations as converters
+    """
+    converters = list(rowclass.__annotations__.values())
+    if all(converter is str for converter in converters):
+        # the csv module already gives us strings; skip the per-field calls
+        return rowclass._make
+    return lambda row: rowclass._make(
+        [converter(val) for converter, val in zip(converters, row)]
+    )
+
+
+def iter_positioned_rows(
+    csvfh: BinaryIO, dialect: Type[csv.unix_dialect] = csv.unix_dialect
+) -> Iterator[Tuple[int, List[str]]]:
+    """
+    parse the (utf-8, binary mode) csv file from its current position,
+    yielding each row along with the offset it starts at, which can be
+    given to seek to read the row again
+    """
+    position = consumed = csvfh.tell()
+
+    def lines() -> Iterator[str]:
+        nonlocal consumed
+        for line in csvfh:
+            consumed += len(line)
+            yield line.decode("utf-8", errors="strict")
+
+    for row in csv.reader(lines(), dialect=dialect):
+        yield position, row
+        position = consumed
+
+
+def iter_checked_rows(
+    csvfh: BinaryIO,
+    path: str,
+    rowclass: Type[T],
+    dialect: Type[csv.unix_dialect] = csv.unix_dialect,
+    stats: Optional[CsvStats] = None,
+) -> Iterator[Tuple[int, List[str]]]:
+    """
+    yield the offset and fields of each usable row of the given csv file,
+    which must have the fields of the given class as its header row (or a
+    RuntimeError is raised); rows with the wrong number of columns are
+    skipped (and counted in stats, if given)
+    """
+    fields = list(rowclass._fields)
+    field_count = len(fields)
+    for i, (position, row) in enumerate(iter_positioned_rows(csvfh, dialect)):
+        if i == 0:
+            if row != fields:
+                raise RuntimeError(
+                    f"in {path}: header row has unexpected columns; "
+                    f"have: {row}; want: {fields}"
+                )
+            continue
+        if not row:
+            # a blank line
+            continue
+        if (row_fieldcount := len(row)) != field_count:
+            logger.warning(
+                (
+                    "in %s: row %s: unexpected column count; "
+                    "have: %s; "
+                    "want: %s; "
+                    "skipping"
+                ),
+                path,
+                i,
+                row_fieldcount,
+                field_count,
+            )
+            if stats is not None:
+                stats.skipped += 1
+            continue
+        if all(is_empty(field) for field in row):
+            logger.warning("in %s: row %s: completely empty row; skipping", path, i)
+            continue
+        if stats is not None:
+            stats.rows += 1
+        yield position, row
+
+
+def iter_typed_csv(
+    path: str,
+    rowclass: Type[T],
+    dialect: Type[csv.unix_dialect] = csv.unix_dialect,
+    chunk_size: int = default_chunk_size,
+    stats: Optional[CsvStats] = None,
+) -> Iterator[List[T]]:
+    """
+    stream the csv file at the given path as lists of (at most chunk_size)
+    named tuples of the given class, so that memory use doesn't grow with the
+    size of the file; raises a RuntimeError if the header row doesn't match
+    the class; rows with the wrong number of columns are skipped (and
+    counted in stats, if given)
+    """
+    build_row = row_builder(rowclass)
+    chunk: List[T] = []
+
+    with open(path, "rb") as csvfh:
+        for _, row in iter_checked_rows(csvfh, path, rowclass, dialect, stats):
+            chunk.append(build_row(row))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
 
 
 def load_typed_csv(
@@ -21,45 +165,73 @@ def load_typed_csv(
     dialect: Type[csv.unix_dialect] = csv.unix_dialect,
 ) -> List[T]:
     """load the csv file at the given path into named tuples of the given class"""
-    result: List[T] = []
-    converters = list(rowclass.__annotations__.values())
-    fields = list(rowclass._fields)
-    field_count = len(fields)
+    return [row for chunk in iter_typed_csv(path, rowclass, dialect) for row in chunk]
+
 
-    with open(path, "rt", newline="", encoding="utf-8", errors="strict") as csvfh:
-        csvfile = csv.reader(csvfh, dialect=dialect)
-        for i, row in enumerate(csvfile):
-            if i == 0:
-                if row != fields:
-                    logger.error(
-                        (
-                            "in %s: header row has unexpected columns; "
-                            "have: %s; "
-                            "want: %s; "
-                            "skipping"
-                        ),
-                        path,
-                        row,
-                        fields,
-                    )
-                    return result
-                continue
-            if (row_fieldcount := len(row)) != field_count:
-                logger.warning(
-                    (
-                        "in %s: row %s: unexpected column count; "
-                        "have: %s; "
-                        "want: %s; "
-                        "skipping"
+def write_run(directory: str, items: Iterable[Tuple[Any, int]]) -> str:
+    """write the given sorted (key, offset) pairs to a new file in directory"""
+    fd, run_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "wb") as run:
+        for item in items:
+            pickle.dump(item, run, protocol=pickle.HIGHEST_PROTOCOL)
+    return run_path
+
+
+def read_run(run_path: str) -> Iterator[Tuple[Any, int]]:
+    """read back (then remove) a file written by write_run"""
+    with open(run_path, "rb") as run:
+        while True:
+            try:
+                yield pickle.load(run)
+            except EOFError:
+                break
+    os.remove(run_path)
+
+
+def merge_runs(run_paths: List[str]) -> Iterator[Tuple[Any, int]]:
+    """merge the given files written by write_run into one sorted stream"""
+    # heapq.merge is stable, so rows with equal keys keep their file order
+    return heapq.merge(*map(read_run, run_paths), key=operator.itemgetter(0))
+
+
+def sorted_typed_csv(
+    path: str,
+    rowclass: Type[T],
+    key: Callable[[T], Any],
+    dialect: Type[csv.unix_dialect] = csv.unix_dialect,
+    chunk_size: int = default_chunk_size,
+    stats: Optional[CsvStats] = None,
+) -> Iterator[T]:
+    """
+    stream the rows of the csv file at the given path in the order given by
+    key; this is an external sort: the keys of each chunk of rows are sorted
+    in memory and spilled to a temporary file along with the offset of their
+    row, then the files are merged (at most max_open_runs at a time) and each
+    row is read again from the csv file, so memory use is bounded by
+    chunk_size and the rest of the row (e.g. a password) never touches the
+    temporary files
+    """
+    build_row = row_builder(rowclass)
+    with tempfile.TemporaryDirectory() as directory, open(path, "rb") as csvfh:
+        run_paths: List[str] = []
+        rows = iter_checked_rows(csvfh, path, rowclass, dialect, stats)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            run_paths.append(
+                write_run(
+                    directory,
+                    sorted(
+                        ((key(build_row(row)), position) for position, row in chunk),
+                        key=operator.itemgetter(0),
                     ),
-                    path,
-                    i,
-                    row_fieldcount,
-                    field_count,
                 )
-                continue
-            if all((is_empty(field) for field in row)):
-                logger.warning("in %s: row %s: completely empty row; skipping", path, i)
-                continue
-            result.append(rowclass(*(converters[i](val) for i, val in enumerate(row))))
-    return result
+            )
+        # neighbouring runs are merged together, so equal keys stay in order
+        while len(run_paths) > max_open_runs:
+            run_paths = [
+                write_run(directory, merge_runs(run_paths[i : i + max_open_runs]))
+                for i in range(0, len(run_paths), max_open_runs)
+            ]
+        for _, position in merge_runs(run_paths):
+            csvfh.seek(position)
+            _, row = next(iter_positioned_rows(csvfh, dialect))
+            yield build_row(row)
@@ -1,19 +1,64 @@
 """misc security-related utils"""
 
+import hashlib
+import hmac
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, Final, Set, Tuple
+
 import bcrypt
 
+logger = logging.getLogger(__name__)
+
+
+# bcrypt cost factors (log2 of the number of key expansion rounds)
+default_bcrypt_rounds: Final = 12
+min_bcrypt_rounds: Final = 10
+max_bcrypt_rounds: Final = 31
 
-def bcrypt_hash(cleartext_password: str) -> str:
+
+def bcrypt_hash(cleartext_password: str, rounds: int = default_bcrypt_rounds) -> str:
     """
-    hash the given cleartext password using bcrypt and return a string value
-    suitable for storage in a database
+    hash the given cleartext password using bcrypt with the given cost factor
+    and return a string value suitable for storage in a database
     """
     return bcrypt.hashpw(
         cleartext_password.encode("utf-8", errors="strict"),
-        bcrypt.gensalt(prefix=b"2a"),
+        bcrypt.gensalt(rounds=rounds, prefix=b"2a"),
     ).decode("utf-8", errors="strict")
 
 
+def bcrypt_cost(rounds: int, samples: int = 3) -> float:
+    """
+    return the number of seconds it takes this host to compute one bcrypt hash
+    with the given cost factor (the fastest of the given number of samples)
+    """
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt_hash("glue-calibration", rounds)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def calibrate_bcrypt_rounds(target_seconds: float) -> Tuple[int, float]:
+    """
+    benchmark this host and return the highest bcrypt cost factor (but at least
+    min_bcrypt_rounds) whose hash time fits within target_seconds, along with
+    the estimated hash time at that cost; each extra round doubles the work, so
+    only the cheapest cost is measured and the rest are extrapolated
+    """
+    rounds = min_bcrypt_rounds
+    seconds = bcrypt_cost(rounds)
+    while rounds < max_bcrypt_rounds and seconds * 2 <= target_seconds:
+        rounds += 1
+        seconds *= 2
+    return rounds, seconds
+
+
 def bcrypt_check(password: str, hashed_password: str) -> bool:
     """
     return true if the given cleartext password matches the given hashed password
@@ -22,3 +67,82 @@ def bcrypt_check(password: str, hashed_password: str) -> bool:
         password.encode("utf-8", errors="strict"),
         hashed_password.encode("utf-8", errors="strict"),
     )
+
+
+class VerificationCache:
+    """
+    remembers which (password, stored password hash) pairs have already been
+    verified with bcrypt, so that unchanged users can be skipped on later runs;
+    entries are keyed by username and hold HMAC(secret, password + hash) rather
+    than anything that could be checked offline without the secret
+    """
+
+    def __init__(self, path: str, secret: str):
+        self.path = path
+        self.key = secret.encode("utf-8", errors="strict")
+        self.entries: Dict[str, str] = {}
+        self.seen: Set[str] = set()
+        try:
+            with open(path, "rt", encoding="utf-8") as cachefh:
+                self.entries = json.load(cachefh)
+        except FileNotFoundError:
+            logger.info("verification cache %s not found; starting empty", path)
+        except (OSError, ValueError) as exc:
+            logger.warning("ignoring unreadable verification cache %s: %s", path, exc)
+
+    def digest(self, password: str, password_hash: str) -> str:
+        """return the cache entry for the given password and stored hash"""
+        return hmac.new(
+            self.key,
+            b"\0".join(
+                (
+                    password.encode("utf-8", errors="strict"),
+                    password_hash.encode("utf-8", errors="strict"),
+                )
+            ),
+            hashlib.sha256,
+        ).hexdigest()
+
+    def check(self, username: str, password: str, password_hash: str) -> bool:
+        """
+        return true if the given password was previously verified against the
+        given stored hash; a stale entry (e.g. the stored hash has changed) is
+        dropped
+        """
+        self.seen.add(username)
+        if (entry := self.entries.get(username)) is None:
+            return False
+        if hmac.compare_digest(entry, self.digest(password, password_hash)):
+            return True
+        del self.entries[username]
+        return False
+
+    def remember(self, username: str, password: str, password_hash: str):
+        """record that the given password matches the given stored hash"""
+        self.seen.add(username)
+        self.entries[username] = self.digest(password, password_hash)
+
+    def save(self):
+        """
+        write the cache back to disk, evicting the users which weren't seen
+        during this run; the file is replaced atomically and is only readable
+        by its owner
+        """
+        entries = {
+            user: self.entries[user] for user in self.seen if user in self.entries
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".glue-cache-")
+        try:
+            with os.fdopen(fd, "wt", encoding="utf-8") as cachefh:
+                json.dump(entries, cachefh, sort_keys=True)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logger.debug(
+            "saved %s verification cache entries (%s evicted)",
+            len(entries),
+            len(self.entries) - len(entries),
+        )
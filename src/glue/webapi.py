@@ -2,16 +2,22 @@
 """interactions with OHDSI WebAPI, over its web API"""
 
 # pylint: disable=R0903
+import functools
 import logging
-from typing import Any, Dict, Optional, Union
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from .config import GlueConfig
 from .semver import SemVer
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # having access to the cleartext password is not good, but we need to be able
 # to make requests to webapi (the web service) and that will require that we
 # sign-in to get a short term bearer token.
@@ -37,22 +43,83 @@ class BearerAuth(requests.auth.AuthBase):
         return r
 
 
+@functools.cache
+def shared_adapter(config: GlueConfig) -> HTTPAdapter:
+    """
+    return the transport adapter shared by every WebAPIClient using the given
+    config; it keeps a pool of connections to webapi alive between requests
+    and retries failed requests with exponential backoff
+    """
+    retry = Retry(
+        total=config.webapi_retries,
+        backoff_factor=config.webapi_backoff,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=("GET", "POST"),
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_maxsize=config.webapi_pool_size,
+        pool_block=True,
+        max_retries=retry,
+    )
+
+
+def new_session(config: GlueConfig) -> requests.Session:
+    """
+    return a new requests session over the shared adapter; each client gets
+    its own session (and so its own cookie jar), since clients act as
+    different users
+    """
+    adapter = shared_adapter(config)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if not config.webapi_keepalive:
+        session.headers["Connection"] = "close"
+    return session
+
+
+def prefetchable(method: Callable[..., T]) -> Callable[..., T]:
+    """
+    decorator for argument-less WebAPIClient methods which lets them be started
+    early in the background with WebAPIClient.prefetch; a call to the method
+    then returns the prefetched result (or raises its error) instead of making
+    the request again
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: "WebAPIClient", *args, **kwargs) -> T:
+        if args or kwargs:
+            return method(self, *args, **kwargs)
+        future = self.prefetched.pop(method.__name__, None)
+        if future is None:
+            return method(self)
+        return future.result()
+
+    return wrapper
+
+
 class WebAPIClient:
     """class for communicating with webapi (as a web api)"""
 
     version: Optional[SemVer]
     info: Dict[str, Any]
+    auth: Optional[BearerAuth]
     username: Optional[str]
     password: Optional[str]
+    prefetched: Dict[str, Future]
 
     def __init__(
         self,
         config: GlueConfig,
         username: Optional[str] = None,
         password: Optional[str] = None,
+        fetch_info: bool = True,
     ):
         self.config = config
+        self.session = new_session(config)
         self.auth = None
+        self.prefetched = {}
 
         if username:
             self.username = username
@@ -65,10 +132,14 @@ class WebAPIClient:
             self.password = config.atlas_password
 
         if self.username and self.password:
-            self.login()
+            self.login(fetch_info)
 
-    def login(self):
-        """sign-in to webapi using the DB auth endpoint"""
+    def login(self, fetch_info: bool = True):
+        """
+        sign-in to webapi using the DB auth endpoint; unless fetch_info is
+        false, also ask webapi for its instance information (including its
+        version)
+        """
         response = self.post(
             "user/login/db",
             data={
@@ -78,9 +149,25 @@ class WebAPIClient:
         )
         response.raise_for_status()
         self.auth = BearerAuth(response.headers["Bearer"])
+        if not fetch_info:
+            return
         self.info = self.get_info()
         self.version = SemVer(str(self.info["version"]))
 
+    def prefetch(self, *method_names: str):
+        """
+        start the given prefetchable methods (e.g. "get_results_ddl") running
+        concurrently in the background, so their requests overlap with
+        whatever is done before their results are needed
+        """
+        pool = ThreadPoolExecutor(max_workers=max(len(method_names), 1))
+        for name in method_names:
+            method = getattr(type(self), name).__wrapped__
+            logger.debug("prefetching %s", name)
+            self.prefetched[name] = pool.submit(method, self)
+        # the threads exit once their requests are done
+        pool.shutdown(wait=False)
+
     def path_url(self, path: str) -> str:
         """return the full url for the given webapi path"""
         scheme = "https" if self.config.webapi_tls else "http"
@@ -95,7 +182,7 @@ class WebAPIClient:
         logger.debug("webapi_post to %s", url)
         if self.auth:
             kwargs["auth"] = self.auth
-        return requests.post(url, *args, timeout=60.0, **kwargs)
+        return self.session.post(url, *args, timeout=60.0, **kwargs)
 
     def get(self, path: str, *args, **kwargs):
         """make a GET request to webapi"""
@@ -103,7 +190,7 @@ class WebAPIClient:
         logger.debug("webapi_get %s", url)
         if self.auth:
             kwargs["auth"] = self.auth
-        return requests.get(url, *args, timeout=60.0, **kwargs)
+        return self.session.get(url, *args, timeout=60.0, **kwargs)
 
     def source_refresh(self):
         """
@@ -113,6 +200,7 @@ class WebAPIClient:
         logger.debug("sending source refresh request")
         self.get("/source/refresh").raise_for_status()
 
+    @prefetchable
     def get_results_ddl(self):
         """
         get SQL code which can be used to establish the results schema
@@ -130,6 +218,7 @@ class WebAPIClient:
         result.raise_for_status()
         return result.text
 
+    @prefetchable
     def get_achilles_ddl(self):
         """
         get SQL code which can be used to (as of WebAPI v2.13) create the
@@ -149,6 +238,7 @@ class WebAPIClient:
         result.raise_for_status()
         return result.text
 
+    @prefetchable
     def get_cem_results_ddl(self):
         """
         Get DDL used to establish the Common Evidence Model results schema in
@@ -156,7 +246,7 @@ class WebAPIClient:
         """
         params = {
             "dialect": self.config.cdm_db_dialect,
-            "schema": self.config.cem_results_schema,
+            "schema": self.config.cem_schema,
             "vocabSchema": self.config.vocab_schema,
         }
         result = self.get("/ddl/cemresults", params=params)
@@ -2,26 +2,53 @@
 """classes and functions for manipulating the WebAPI appdb directly"""
 
 # pylint: disable=R0913
+import contextlib
+import functools
+import itertools
 import logging
 import re
-from typing import Dict, List, Literal
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TypeAlias,
+)
 
 from . import semver
 from .config import GlueConfig
-from .db.multidb import MultiDB
+from .db.multidb import MultiDB, max_list_params
 from .models import (
     BasicSecurityUser,
     BasicSecurityUserBulkEntry,
     CDMSource,
     CDMSourceDaimon,
     SecRole,
+    SecUserRoleEntry,
+)
+from .util.csv import CsvStats, iter_typed_csv, sorted_typed_csv
+from .util.security import (
+    VerificationCache,
+    bcrypt_check,
+    bcrypt_cost,
+    bcrypt_hash,
+    calibrate_bcrypt_rounds,
 )
-from .util.csv import load_typed_csv
-from .util.security import bcrypt_check, bcrypt_hash
 
 logger = logging.getLogger(__name__)
 
 ADMIN_ROLE_ID = 2  # webapi sec_user_role role_id
+DEFAULT_ROLE = "public"  # webapi sec_role name given to every new user
+
+BULK_USER_CHUNK_SIZE = 1000  # bulk file users reconciled at a time
 
 BULK_USER_STATUS = Literal[
     "OK",
@@ -32,17 +59,69 @@ BULK_USER_STATUS = Literal[
 ]
 
 
+class BulkUserResults(NamedTuple):
+    """
+    what bulk_ensure_basic_security_users did: the status of each username,
+    and the users which were created or updated (whose passwords are still
+    needed to sign-in to webapi as them)
+    """
+
+    statuses: Dict[str, BULK_USER_STATUS]
+    changed: List[BasicSecurityUserBulkEntry]
+
+
 def get_sec_roles(config: GlueConfig, app_db: MultiDB) -> List[SecRole]:
     """return a list of user records from the webapi sec_* databases"""
     return [
         SecRole(*row)
-        for row in app_db.get_rows(
+        for row in app_db.iter_rows(
             MultiDB.sqlfile("get_sec_roles.sql"),
             ID_schema=config.ohdsi_schema,
         )
     ]
 
 
+@functools.cache
+def bcrypt_rounds(config: GlueConfig) -> int:
+    """
+    return the bcrypt cost factor to hash new passwords with; this is either
+    configured directly or found (once per config) by benchmarking this host
+    """
+    if config.bcrypt_target_latency <= 0:
+        return config.bcrypt_rounds
+    rounds, seconds = calibrate_bcrypt_rounds(config.bcrypt_target_latency)
+    logger.info(
+        "calibrated bcrypt cost %s (about %.3fs per hash; target %.3fs)",
+        rounds,
+        seconds,
+        config.bcrypt_target_latency,
+    )
+    return rounds
+
+
+def estimate_bulk_user_time(config: GlueConfig) -> float:
+    """
+    log and return the estimated number of seconds needed to hash (or verify)
+    the password of every user in the bulk user file, given the bcrypt cost
+    and number of workers in use; this is an upper bound since unchanged users
+    which hit the verification cache skip bcrypt entirely
+    """
+    rounds = bcrypt_rounds(config)
+    with open(config.bulk_user_file or "", "rb") as csvfh:
+        # not a csv parse; just a quick count, less the header row
+        users = max(sum(1 for _ in csvfh) - 1, 0)
+    seconds = users * bcrypt_cost(rounds, samples=1) / max(config.bulk_user_workers, 1)
+    logger.info(
+        "the bulk user file has about %s users; at bcrypt cost %s on %s workers "
+        "their passwords will take up to %.1fs to process",
+        users,
+        rounds,
+        config.bulk_user_workers,
+        seconds,
+    )
+    return seconds
+
+
 def update_basic_security_user(
     config: GlueConfig, sec_db: MultiDB, username: str, password: str
 ):
@@ -52,137 +131,570 @@ def update_basic_security_user(
         MultiDB.sqlfile("update_password.sql"),
         ID_schema=config.security_schema,
         username=username,
-        password_hash=bcrypt_hash(password),
+        password_hash=bcrypt_hash(password, bcrypt_rounds(config)),
     )
     logger.debug("done")
 
 
-def bulk_ensure_basic_security_users(
-    config: GlueConfig,
-    sec_db: MultiDB,
-) -> Dict[BasicSecurityUserBulkEntry, BULK_USER_STATUS]:
-    """ensure that the users in the given csv file exist with the given passwords"""
-    csv_users: Dict[str, BasicSecurityUserBulkEntry] = {}
-    db_users: Dict[str, BasicSecurityUser] = {}
-    result: Dict[BasicSecurityUserBulkEntry, BULK_USER_STATUS] = {}
+UserPair: TypeAlias = Tuple[
+    Optional[BasicSecurityUserBulkEntry],
+    Optional[BasicSecurityUser],
+]
+
 
+def indexed_user_pairs(
+    config: GlueConfig, sec_db: MultiDB, stats: CsvStats
+) -> Iterator[UserPair]:
+    """
+    pair each entry of the bulk user file with the matching security db user
+    (if any), followed by the db users which are missing from the bulk file;
+    the bulk file is streamed, the db users are indexed in memory; the rows
+    read from the file are counted in stats
+    """
     if config.bulk_user_file is None:
         raise RuntimeError("bulk_user_file cannot be none")
 
-    # load users from the bulk file
-    csv_entries = load_typed_csv(config.bulk_user_file, BasicSecurityUserBulkEntry)
-    csv_users = {entry.username: entry for entry in csv_entries}
-
     # load users from the database
-    for row in sec_db.get_rows(
+    db_users: Dict[str, BasicSecurityUser] = {}
+    for row in sec_db.iter_rows(
         MultiDB.sqlfile("get_users.sql"),
         ID_schema=config.security_schema,
     ):
         db_record = BasicSecurityUser(*row)
         db_users[db_record.username] = db_record
 
-    # exclude the main atlas admin account from consideration below
-    del db_users[config.atlas_username]
-
-    # create the set of operations to perform
-    deletes = db_users.keys() - csv_users.keys()  # delete - user in db, not csv
-    creates = csv_users.keys() - db_users.keys()  # create - in csv, not db
-    updates = db_users.keys() & csv_users.keys()  # update - user in both
-
-    for username in deletes:
-        logger.warning("DELETE USER %s - delete is not currently implemented", username)
-        user = BasicSecurityUserBulkEntry.from_BasicSecurityUser(db_users[username])
-        result[user] = "ERROR"
-        # result[user] = BULK_USER_STATUS_DELETED
-
-    for username in updates:
-        csv_record = csv_users[username]
-        if bcrypt_check(csv_record.password, db_users[username].password_hash):
-            logger.debug("OK USER %s", username)
-            result[csv_record] = "OK"
+    # stream users from the bulk file
+    seen: Set[str] = set()
+    for chunk in iter_typed_csv(
+        config.bulk_user_file, BasicSecurityUserBulkEntry, stats=stats
+    ):
+        for entry in chunk:
+            if entry.username in seen:
+                logger.warning(
+                    "DUPLICATE USER %s - ignoring repeat entry", entry.username
+                )
+                continue
+            seen.add(entry.username)
+            yield entry, db_users.get(entry.username)
+
+    for username in sorted(db_users.keys() - seen):
+        yield None, db_users[username]
+
+
+def username_sort_key(dialect: str) -> Callable[[str], Any]:
+    """
+    return the key which sorts usernames the way get_users_sorted.sql does on
+    the given dialect: by code point on postgres (the utf-8 bytes, per the "C"
+    collation), and by utf-16 code unit on sql server (per the binary
+    collation of the usernames as nvarchar)
+    """
+    if dialect == "postgresql":
+        return lambda username: username
+    return lambda username: username.encode("utf-16-be")
+
+
+def merged_user_pairs(
+    config: GlueConfig, reader_db: MultiDB, stats: CsvStats
+) -> Iterator[UserPair]:
+    """
+    pair each entry of the bulk user file with the matching security db user
+    (if any), and each db user missing from the bulk file with None, using a
+    merge join over both sides sorted by username; unlike indexed_user_pairs
+    neither side is held in memory; the rows read from the file are counted
+    in stats
+    """
+    if config.bulk_user_file is None:
+        raise RuntimeError("bulk_user_file cannot be none")
+
+    sort_key = username_sort_key(reader_db.dialect)
+    sorted_csv_users = sorted_typed_csv(
+        config.bulk_user_file,
+        BasicSecurityUserBulkEntry,
+        key=lambda entry: sort_key(entry.username),
+        stats=stats,
+    )
+    # the query sorts with a binary collation which orders the usernames the
+    # same way as sort_key
+    sorted_db_users = (
+        BasicSecurityUser(*row)
+        for row in reader_db.iter_rows(
+            reader_db.dialect_sqlfile("get_users_sorted.sql"),
+            ID_schema=config.security_schema,
+        )
+    )
+
+    # a pairing made from out of order input would be wrong, so each side is
+    # checked as it is read
+    def ordered(records: Iterator[Any], side: str, strict: bool) -> Iterator[Any]:
+        previous: Optional[Any] = None
+        for record in records:
+            key = sort_key(record.username)
+            if previous is not None and (key <= previous if strict else key < previous):
+                raise RuntimeError(
+                    f"the {side} users are out of order at {record.username}; "
+                    f"unable to merge them"
+                )
+            previous = key
+            yield record
+
+    csv_users = ordered(sorted_csv_users, "bulk file", strict=False)
+    db_users = ordered(sorted_db_users, "security db", strict=True)
+
+    csv_record = next(csv_users, None)
+    db_record = next(db_users, None)
+    previous_username: Optional[str] = None
+    while csv_record is not None or db_record is not None:
+        if csv_record is not None and csv_record.username == previous_username:
+            logger.warning(
+                "DUPLICATE USER %s - ignoring repeat entry", csv_record.username
+            )
+            csv_record = next(csv_users, None)
             continue
-        logger.info("UPDATE USER %s", username)
-        update_basic_security_user(config, sec_db, username, csv_record.password)
-        result[csv_record] = "UPDATED"
+        if csv_record is not None and (
+            db_record is None
+            or sort_key(csv_record.username) < sort_key(db_record.username)
+        ):
+            yield csv_record, None
+            previous_username = csv_record.username
+            csv_record = next(csv_users, None)
+        elif db_record is not None and (
+            csv_record is None
+            or sort_key(db_record.username) < sort_key(csv_record.username)
+        ):
+            yield None, db_record
+            db_record = next(db_users, None)
+        else:
+            yield csv_record, db_record
+            previous_username = csv_record.username if csv_record else None
+            csv_record = next(csv_users, None)
+            db_record = next(db_users, None)
 
-    for username in creates:
-        csv_record = csv_users[username]
-        logger.info("CREATE USER %s", username)
+
+def bulk_ensure_basic_security_users(
+    config: GlueConfig,
+    sec_db: MultiDB,
+) -> BulkUserResults:
+    """
+    ensure that the users in the given csv file exist with the given passwords;
+    only the users which were created or updated are kept in full
+    """
+    result = BulkUserResults({}, [])
+
+    cache: Optional[VerificationCache] = None
+    if config.bcrypt_cache_file:
+        if not config.bcrypt_cache_secret:
+            raise RuntimeError("bcrypt_cache_file requires bcrypt_cache_secret")
+        cache = VerificationCache(config.bcrypt_cache_file, config.bcrypt_cache_secret)
+
+    stats = CsvStats()
+    deletes: List[str] = []
+    with contextlib.ExitStack() as stack:
+        user_pairs: Iterator[UserPair]
+        if config.bulk_user_merge_join:
+            # the db users are streamed over a second connection so that the
+            # open result set doesn't get in the way of the writes below
+            reader_db = stack.enter_context(MultiDB(**config.security_db_params()))
+            user_pairs = merged_user_pairs(config, reader_db, stats)
+        else:
+            user_pairs = indexed_user_pairs(config, sec_db, stats)
+        pool = stack.enter_context(
+            ThreadPoolExecutor(max_workers=config.bulk_user_workers)
+        )
+
+        # the new and changed users are staged in a temp table one chunk at a
+        # time, then applied with one set-based UPDATE and one INSERT, all in a
+        # single transaction
+        stack.enter_context(sec_db.transaction())
+        sec_db.execute(sec_db.dialect_sqlfile("create_users_staging.sql"))
+        while chunk := list(itertools.islice(user_pairs, BULK_USER_CHUNK_SIZE)):
+            stage_bulk_users(config, sec_db, pool, chunk, result, deletes, cache)
+        # a bulk file which couldn't be read in full would make its missing
+        # users look like they should be deleted
+        if deletes and (stats.skipped or not stats.rows):
+            logger.error(
+                "not deleting %s user(s) missing from %s since it %s",
+                len(deletes),
+                config.bulk_user_file,
+                f"had {stats.skipped} unreadable row(s)"
+                if stats.skipped
+                else "has no users",
+            )
+            for username in deletes:
+                result.statuses[username] = "ERROR"
+        else:
+            delete_bulk_users(config, sec_db, deletes, result)
         sec_db.execute(
-            MultiDB.sqlfile("create_user.sql"),
+            sec_db.dialect_sqlfile("update_staged_users.sql"),
+            ID_schema=config.security_schema,
+        )
+        sec_db.execute(
+            sec_db.dialect_sqlfile("insert_staged_users.sql"),
             ID_schema=config.security_schema,
-            username=csv_record.username,
-            firstname=csv_record.firstname,
-            middlename=csv_record.middlename,
-            lastname=csv_record.lastname,
-            password_hash=bcrypt_hash(csv_record.password),
         )
-        result[csv_record] = "CREATED"
+
+    # only written once the transaction has committed
+    if cache is not None:
+        cache.save()
 
     return result
 
 
+def stage_bulk_users(
+    config: GlueConfig,
+    sec_db: MultiDB,
+    pool: Executor,
+    user_pairs: List[UserPair],
+    result: BulkUserResults,
+    deletes: List[str],
+    cache: Optional[VerificationCache] = None,
+):
+    """
+    decide what to do with each of the given bulk file / security db user
+    pairs, recording the outcome in result and staging the users which need
+    to be created or updated; the users to delete (once the whole file
+    has been read, see delete_bulk_users) are added to deletes; users whose
+    password and stored hash are unchanged since they were last verified
+    (per cache) skip the bcrypt check
+    """
+    updates: List[Tuple[BasicSecurityUserBulkEntry, BasicSecurityUser]] = []
+    creates: List[BasicSecurityUserBulkEntry] = []
+    for csv_record, db_record in user_pairs:
+        if csv_record is not None and csv_record.username == config.atlas_username:
+            # the main atlas admin account is managed separately
+            continue
+        if csv_record is None:
+            if db_record is None or db_record.username == config.atlas_username:
+                continue
+            # delete - user in db, not csv
+            if config.bulk_user_delete:
+                deletes.append(db_record.username)
+            else:
+                logger.warning(
+                    "DELETE USER %s - delete is not enabled (see bulk_user_delete)",
+                    db_record.username,
+                )
+                result.statuses[db_record.username] = "ERROR"
+        elif db_record is None:
+            # create - in csv, not db
+            creates.append(csv_record)
+        elif cache is not None and cache.check(
+            csv_record.username, csv_record.password, db_record.password_hash
+        ):
+            # unchanged - user in both, verified on a previous run
+            logger.debug("OK USER %s (cached)", csv_record.username)
+            result.statuses[csv_record.username] = "OK"
+        else:
+            # update - user in both
+            updates.append((csv_record, db_record))
+
+    # bcrypt releases the GIL while it works, so the password checks and
+    # hashes are spread over a thread pool; the results are collected in input
+    # order and the database is only touched from this thread
+    password_ok = pool.map(
+        lambda pair: bcrypt_check(pair[0].password, pair[1].password_hash),
+        updates,
+    )
+    changed: List[BasicSecurityUserBulkEntry] = []
+    for (csv_record, db_record), ok in zip(updates, password_ok):
+        if ok:
+            logger.debug("OK USER %s", csv_record.username)
+            result.statuses[csv_record.username] = "OK"
+            if cache is not None:
+                cache.remember(
+                    csv_record.username, csv_record.password, db_record.password_hash
+                )
+        else:
+            changed.append(csv_record)
+
+    staged = changed + creates
+    rounds = bcrypt_rounds(config)
+    password_hashes = list(
+        pool.map(lambda entry: bcrypt_hash(entry.password, rounds), staged)
+    )
+    if cache is not None:
+        for csv_record, password_hash in zip(staged, password_hashes):
+            cache.remember(csv_record.username, csv_record.password, password_hash)
+    sec_db.execute_many(
+        sec_db.dialect_sqlfile("stage_user.sql"),
+        (
+            {
+                "username": csv_record.username,
+                "password_hash": password_hash,
+                "firstname": csv_record.firstname,
+                "middlename": csv_record.middlename,
+                "lastname": csv_record.lastname,
+            }
+            for csv_record, password_hash in zip(staged, password_hashes)
+        ),
+    )
+
+    for csv_record in changed:
+        logger.info("UPDATE USER %s", csv_record.username)
+        result.statuses[csv_record.username] = "UPDATED"
+        result.changed.append(csv_record)
+
+    for csv_record in creates:
+        logger.info("CREATE USER %s", csv_record.username)
+        result.statuses[csv_record.username] = "CREATED"
+        result.changed.append(csv_record)
+
+
+def delete_bulk_users(
+    config: GlueConfig,
+    sec_db: MultiDB,
+    usernames: List[str],
+    result: BulkUserResults,
+):
+    """delete the given users from the security db, recording it in result"""
+    for i in range(0, len(usernames), max_list_params):
+        sec_db.execute(
+            MultiDB.sqlfile("delete_users.sql"),
+            ID_schema=config.security_schema,
+            usernames=usernames[i : i + max_list_params],
+        )
+    for username in usernames:
+        logger.info("DELETE USER %s", username)
+        result.statuses[username] = "DELETED"
+
+
 def ensure_basic_security_user(
     config: GlueConfig, sec_db: MultiDB, username: str, password: str
 ):
     """
     ensure that the basic security tables have a user entry for the given user
     """
-    user = sec_db.get_rows(
-        MultiDB.sqlfile("get_user.sql"),
-        ID_schema=config.security_schema,
-        username=username,
-    )
+    # the lookup and create/update are one unit of work
+    with sec_db.transaction():
+        user = sec_db.get_rows(
+            MultiDB.sqlfile("get_user.sql"),
+            ID_schema=config.security_schema,
+            username=username,
+        )
 
-    if len(user) == 1:
-        logger.debug("found the user %s in the database", username)
-        user_record = BasicSecurityUser(*user[0])
-        if config.update_passwords:
-            if bcrypt_check(password, user_record.password_hash):
-                logger.info("found user %s in security db; password OK", username)
-            else:
-                logger.info("found user %s in security db; changing password", username)
-                update_basic_security_user(config, sec_db, username, password)
-        return
-    if len(user) != 0:
-        raise RuntimeError("expected exactly one response from the get_user query")
+        if len(user) == 1:
+            logger.debug("found the user %s in the database", username)
+            user_record = BasicSecurityUser(*user[0])
+            if config.update_passwords:
+                if bcrypt_check(password, user_record.password_hash):
+                    logger.info("found user %s in security db; password OK", username)
+                else:
+                    logger.info(
+                        "found user %s in security db; changing password", username
+                    )
+                    update_basic_security_user(config, sec_db, username, password)
+            return
+        if len(user) != 0:
+            raise RuntimeError("expected exactly one response from the get_user query")
 
-    logger.debug("the user %s was not found; creating...", username)
+        logger.debug("the user %s was not found; creating...", username)
 
-    sec_db.execute(
-        MultiDB.sqlfile("create_user.sql"),
-        ID_schema=config.security_schema,
-        username=username,
-        firstname=username,
-        lastname="",
-        password_hash=bcrypt_hash(password),
-    )
-    logger.debug("done")
+        sec_db.execute(
+            MultiDB.sqlfile("create_user.sql"),
+            ID_schema=config.security_schema,
+            username=username,
+            firstname=username,
+            lastname="",
+            password_hash=bcrypt_hash(password, bcrypt_rounds(config)),
+        )
+        logger.debug("done")
+
+
+def bulk_ensure_sec_users(
+    config: GlueConfig,
+    app_db: MultiDB,
+    users: Iterable[BasicSecurityUserBulkEntry],
+    webapi_version: semver.SemVer,
+):
+    """
+    ensure that the given users have webapi sec_user entries, along with the
+    personal sec_role and the sec_user_role memberships (personal and default
+    role) that webapi would create on their first sign-in; the users are
+    staged in a temp table and each table is then filled by a single
+    INSERT ... SELECT (which also draws the sequence values), all in one
+    transaction
+    """
+    # webapi 2.8 added sec_user.origin and sec_role.system_role
+    if webapi_version >= "2.8.0":
+        logger.debug("bulk_ensure_sec_users selected v2 queries")
+        query_version = "v2"
+    else:
+        logger.debug("bulk_ensure_sec_users selected v1 queries")
+        query_version = "v1"
+
+    with app_db.transaction():
+        app_db.execute(MultiDB.sqlfile("create_sec_user_staging.sql"))
+        count = app_db.execute_many(
+            MultiDB.sqlfile("stage_sec_user.sql"),
+            (
+                {
+                    "login": user.username,
+                    "name": " ".join(
+                        name
+                        for name in (user.firstname, user.middlename, user.lastname)
+                        if name
+                    )
+                    or user.username,
+                }
+                for user in users
+            ),
+        )
+        app_db.execute(
+            MultiDB.sqlfile(f"create_sec_users-{query_version}.sql"),
+            ID_schema=config.ohdsi_schema,
+        )
+        app_db.execute(
+            MultiDB.sqlfile(f"create_sec_personal_roles-{query_version}.sql"),
+            ID_schema=config.ohdsi_schema,
+        )
+        app_db.execute(
+            MultiDB.sqlfile(f"create_sec_user_roles-{query_version}.sql"),
+            ID_schema=config.ohdsi_schema,
+            default_role=DEFAULT_ROLE,
+        )
+    logger.info("ensured webapi sec_user entries for %s bulk user(s)", count)
+
+
+def bulk_remove_sec_user_roles(
+    config: GlueConfig, app_db: MultiDB, usernames: Iterable[str]
+):
+    """
+    remove all of the webapi role memberships of the given users; one DELETE
+    is sent per max_list_params users, all in a single transaction
+    """
+    logins = sorted(set(usernames))
+    with app_db.transaction():
+        for i in range(0, len(logins), max_list_params):
+            app_db.execute(
+                MultiDB.sqlfile("delete_sec_user_roles.sql"),
+                ID_schema=config.ohdsi_schema,
+                logins=logins[i : i + max_list_params],
+            )
+    logger.info("removed the webapi role memberships of %s user(s)", len(logins))
 
 
-def ensure_admin_role(config: GlueConfig, app_db: MultiDB, username: str):
+def ensure_admin_roles(config: GlueConfig, app_db: MultiDB, usernames: Iterable[str]):
     """
-    ensure that the atlas admin user is an admin
+    ensure that the given users are admins; the current admins are fetched with
+    one query and the missing role entries are added with one INSERT ... SELECT
+    per max_list_params users, in a single transaction
     """
     # insert into ohdsi.sec_user_role (user_id, role_id) values (1000,2);
-    for role in get_sec_roles(config, app_db):
-        if role.login == username and role.role_id == ADMIN_ROLE_ID:
-            # the user exists, our work here is done
+    admins = set(
+        app_db.iter_column(
+            MultiDB.sqlfile("get_role_logins.sql"),
+            ID_schema=config.ohdsi_schema,
+            role_id=ADMIN_ROLE_ID,
+        )
+    )
+    missing: List[str] = []
+    for username in sorted(set(usernames)):
+        if username in admins:
             logger.info("the user %s already has the admin sec role", username)
-            return
+        else:
+            logger.info(
+                "the user %s does not appear to have the admin sec role; adding role...",
+                username,
+            )
+            missing.append(username)
+    if not missing:
+        return
 
-    logger.info(
-        "the user %s does not appear to have the admin sec role; adding role...",
-        username,
-    )
+    with app_db.transaction():
+        for i in range(0, len(missing), max_list_params):
+            app_db.execute(
+                MultiDB.sqlfile("add_admin_role.sql"),
+                ID_schema=config.ohdsi_schema,
+                LIT_admin_role_id=ADMIN_ROLE_ID,
+                logins=missing[i : i + max_list_params],
+            )
+    logger.debug("done")
 
-    app_db.execute(
-        MultiDB.sqlfile("add_admin_role.sql"),
+
+def sync_sec_user_roles(config: GlueConfig, app_db: MultiDB):
+    """
+    add and remove webapi role memberships to match the role mapping file;
+    only the users and roles which appear in the file are managed, and a file
+    which matches the database results in no writes at all
+    """
+    if config.role_mapping_file is None:
+        raise RuntimeError("role_mapping_file cannot be none")
+
+    # the current memberships are read with one query; the id lookups are
+    # needed for the users and roles which don't have memberships yet
+    current = {
+        (role.user_id, role.role_id): role for role in get_sec_roles(config, app_db)
+    }
+    user_ids: Dict[str, int] = dict(
+        app_db.iter_rows(
+            MultiDB.sqlfile("get_sec_user_ids.sql"),
+            ID_schema=config.ohdsi_schema,
+        )
+    )
+    role_ids: Dict[str, List[int]] = {}
+    for name, role_id in app_db.iter_rows(
+        MultiDB.sqlfile("get_sec_role_ids.sql"),
         ID_schema=config.ohdsi_schema,
-        LIT_admin_role_id=ADMIN_ROLE_ID,
-        login=username,
+    ):
+        role_ids.setdefault(name, []).append(role_id)
+
+    wanted: Set[Tuple[int, int]] = set()
+    managed_users: Set[int] = set()
+    managed_roles: Set[int] = set()
+    for chunk in iter_typed_csv(config.role_mapping_file, SecUserRoleEntry):
+        for entry in chunk:
+            if (user_id := user_ids.get(entry.username)) is None:
+                logger.warning(
+                    "ROLE %s USER %s - no such webapi user; skipping",
+                    entry.role,
+                    entry.username,
+                )
+                continue
+            if len(matching_roles := role_ids.get(entry.role, [])) != 1:
+                logger.warning(
+                    "ROLE %s USER %s - expected exactly one webapi role with this "
+                    "name, found %s; skipping",
+                    entry.role,
+                    entry.username,
+                    len(matching_roles),
+                )
+                continue
+            wanted.add((user_id, matching_roles[0]))
+            managed_users.add(user_id)
+            managed_roles.add(matching_roles[0])
+
+    adds = sorted(wanted - current.keys())
+    removes = sorted(
+        (user_id, role_id)
+        for user_id, role_id in current.keys() - wanted
+        if user_id in managed_users
+        and role_id in managed_roles
+        # glue relies on the atlas user keeping its admin role
+        and not (
+            role_id == ADMIN_ROLE_ID
+            and current[(user_id, role_id)].login == config.atlas_username
+        )
+    )
+    if not adds and not removes:
+        logger.info("role memberships already match %s", config.role_mapping_file)
+        return
+
+    with app_db.transaction():
+        app_db.execute_many(
+            MultiDB.sqlfile("remove_sec_user_role.sql"),
+            ({"user_id": user_id, "role_id": role_id} for user_id, role_id in removes),
+            ID_schema=config.ohdsi_schema,
+        )
+        app_db.execute_many(
+            MultiDB.sqlfile("add_sec_user_role.sql"),
+            ({"user_id": user_id, "role_id": role_id} for user_id, role_id in adds),
+            ID_schema=config.ohdsi_schema,
+        )
+    logger.info(
+        "role memberships synced from %s: %s added, %s removed",
+        config.role_mapping_file,
+        len(adds),
+        len(removes),
     )
-    logger.debug("done")
 
 
 def derived_source_key(config: GlueConfig) -> str:
@@ -219,148 +731,152 @@ def ensure_webapi_source(
             "Unrecognized cdm database dialect: " + config.cdm_db_dialect
         )
 
-    # see if a source exists
-    existing_sources = [
-        CDMSource(*row)
-        for row in app_db.get_rows(
-            MultiDB.sqlfile("get_sources.sql"),
-            ID_schema=config.ohdsi_schema,
-            source_key=config.source_key,
-        )
-    ]
-    if len(existing_sources) == 0:
-        # no source exists, create one
-        create_source(config, app_db, jdbc_url, webapi_version)
-        return
-
-    if len(existing_sources) == 1:
-        # there is a source, check it
-        existing_source = existing_sources[0]
-        if (
-            existing_source.source_name == config.source_name
-            and existing_source.source_connection == jdbc_url
-            and existing_source.source_dialect == config.cdm_db_dialect
-        ):
-            # the source looks ok
+    # the lookup and create/update are one unit of work
+    with app_db.transaction():
+        # see if a source exists
+        existing_sources = [
+            CDMSource(*row)
+            for row in app_db.get_rows(
+                MultiDB.sqlfile("get_sources.sql"),
+                ID_schema=config.ohdsi_schema,
+                source_key=config.source_key,
+            )
+        ]
+        if len(existing_sources) == 0:
+            # no source exists, create one
+            create_source(config, app_db, jdbc_url, webapi_version)
             return
 
-        # the source does not look right; update it
-        update_source(config, app_db, jdbc_url, webapi_version)
-        return
+        if len(existing_sources) == 1:
+            # there is a source, check it
+            existing_source = existing_sources[0]
+            if (
+                existing_source.source_name == config.source_name
+                and existing_source.source_connection == jdbc_url
+                and existing_source.source_dialect == config.cdm_db_dialect
+            ):
+                # the source looks ok
+                return
 
-    # there is more than 1 existing source with that source_key... that's weird
-    raise RuntimeError(
-        f"Expected either no matching sources or exactly 1. Got these: "
-        f"{existing_sources!r}"
-    )
+            # the source does not look right; update it
+            update_source(config, app_db, jdbc_url, webapi_version)
+            return
+
+        # there is more than 1 existing source with that source_key... that's weird
+        raise RuntimeError(
+            f"Expected either no matching sources or exactly 1. Got these: "
+            f"{existing_sources!r}"
+        )
 
 
 def ensure_webapi_source_daimons(config: GlueConfig, app_db: MultiDB):
     """
     ensure that the appropriate source_daimon entries exist for a particular source
     """
-    # find out our source_id
-    source_ids = app_db.get_column(
-        MultiDB.sqlfile("get_source_id.sql"),
-        ID_schema=config.ohdsi_schema,
-        source_key=config.source_key,
-    )
-    if len(source_ids) != 1:
-        # no daimons; create them
-        raise RuntimeError(
-            (
-                "Expected exactly 1 source to exist with the given source key. Got "
-                f"this list: {source_ids!r}"
-            )
-        )
-    source_id = source_ids[0]
-
-    # get the existing daimons for this id
-    existing_source_daimons = [
-        CDMSourceDaimon(*row)
-        for row in app_db.get_rows(
-            MultiDB.sqlfile("get_source_daimons.sql"),
+    # all of the daimon changes are committed together
+    with app_db.transaction():
+        # find out our source_id
+        source_ids = app_db.get_column(
+            MultiDB.sqlfile("get_source_id.sql"),
             ID_schema=config.ohdsi_schema,
-            source_id=source_id,
+            source_key=config.source_key,
         )
-    ]
+        if len(source_ids) != 1:
+            # no daimons; create them
+            raise RuntimeError(
+                (
+                    "Expected exactly 1 source to exist with the given source key. Got "
+                    f"this list: {source_ids!r}"
+                )
+            )
+        source_id = source_ids[0]
+
+        # get the existing daimons for this id
+        existing_source_daimons = [
+            CDMSourceDaimon(*row)
+            for row in app_db.get_rows(
+                MultiDB.sqlfile("get_source_daimons.sql"),
+                ID_schema=config.ohdsi_schema,
+                source_id=source_id,
+            )
+        ]
 
-    # this list specifies the 4 daimons we expect to exist for every source
-    expected_daimons = [
-        CDMSourceDaimon(
-            source_daimon_id=-1,  # phony value
-            source_id=source_id,
-            daimon_type=0,
-            table_qualifier=config.cdm_schema,
-            priority=0,
-        ),
-        CDMSourceDaimon(
-            source_daimon_id=-1,  # phony value
-            source_id=source_id,
-            daimon_type=1,
-            table_qualifier=config.vocab_schema,
-            priority=1,
-        ),
-        CDMSourceDaimon(
-            source_daimon_id=-1,  # phony value
-            source_id=source_id,
-            daimon_type=2,
-            table_qualifier=config.results_schema,
-            priority=1,
-        ),
-        CDMSourceDaimon(
-            source_daimon_id=-1,  # phony value
-            source_id=source_id,
-            daimon_type=5,
-            table_qualifier=config.temp_schema,
-            priority=0,
-        ),
-    ]
-    for expected in expected_daimons:
-        matching_daimons = [
-            daimon
-            for daimon in existing_source_daimons
-            if daimon.daimon_type == expected.daimon_type
+        # this list specifies the 4 daimons we expect to exist for every source
+        expected_daimons = [
+            CDMSourceDaimon(
+                source_daimon_id=-1,  # phony value
+                source_id=source_id,
+                daimon_type=0,
+                table_qualifier=config.cdm_schema,
+                priority=0,
+            ),
+            CDMSourceDaimon(
+                source_daimon_id=-1,  # phony value
+                source_id=source_id,
+                daimon_type=1,
+                table_qualifier=config.vocab_schema,
+                priority=1,
+            ),
+            CDMSourceDaimon(
+                source_daimon_id=-1,  # phony value
+                source_id=source_id,
+                daimon_type=2,
+                table_qualifier=config.results_schema,
+                priority=1,
+            ),
+            CDMSourceDaimon(
+                source_daimon_id=-1,  # phony value
+                source_id=source_id,
+                daimon_type=5,
+                table_qualifier=config.temp_schema,
+                priority=0,
+            ),
         ]
-        if len(matching_daimons) == 0:
-            # no such daimon exists; create it
-            create_source_daimon(
-                config,
-                app_db,
-                source_id,
-                expected.daimon_type,
-                expected.table_qualifier,
-                expected.priority,
-            )
-            continue
+        for expected in expected_daimons:
+            matching_daimons = [
+                daimon
+                for daimon in existing_source_daimons
+                if daimon.daimon_type == expected.daimon_type
+            ]
+            if len(matching_daimons) == 0:
+                # no such daimon exists; create it
+                create_source_daimon(
+                    config,
+                    app_db,
+                    source_id,
+                    expected.daimon_type,
+                    expected.table_qualifier,
+                    expected.priority,
+                )
+                continue
 
-        if len(matching_daimons) == 1:
-            existing_daimon = matching_daimons[0]
-            # verify it is a complete match
-            if (
-                existing_daimon.table_qualifier == expected.table_qualifier
-                and existing_daimon.priority == expected.priority
-            ):
-                # complete match; done
+            if len(matching_daimons) == 1:
+                existing_daimon = matching_daimons[0]
+                # verify it is a complete match
+                if (
+                    existing_daimon.table_qualifier == expected.table_qualifier
+                    and existing_daimon.priority == expected.priority
+                ):
+                    # complete match; done
+                    continue
+                # incomplete match; update
+                update_source_daimon(
+                    config,
+                    app_db,
+                    existing_daimon.source_daimon_id,
+                    existing_daimon.daimon_type,
+                    expected.table_qualifier,
+                    expected.priority,
+                )
                 continue
-            # incomplete match; update
-            update_source_daimon(
-                config,
-                app_db,
-                existing_daimon.source_daimon_id,
-                existing_daimon.daimon_type,
-                expected.table_qualifier,
-                expected.priority,
-            )
-            continue
 
-        # len is not 1 or 0. this is weird.
-        raise RuntimeError(
-            (
-                "Expected either no matching source_daimons or exactly 1. Got these: "
-                f"{matching_daimons!r}"
+            # len is not 1 or 0. this is weird.
+            raise RuntimeError(
+                (
+                    "Expected either no matching source_daimons or exactly 1. Got these: "
+                    f"{matching_daimons!r}"
+                )
             )
-        )
 
 
 def update_source(
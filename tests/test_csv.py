@@ -0,0 +1,95 @@
+"""tests for reading typed csv files"""
+
+import csv
+import random
+import tempfile
+from typing import NamedTuple
+
+import pytest
+
+import glue.util.csv
+from glue.util.csv import CsvStats, iter_typed_csv, sorted_typed_csv
+
+
+class Row(NamedTuple):
+    username: str
+    password: str
+
+
+def write_csv(path, rows) -> str:
+    with open(path, "w", newline="", encoding="utf-8") as csvfh:
+        csv.writer(csvfh, dialect=csv.unix_dialect).writerows(rows)
+    return str(path)
+
+
+def test_iter_typed_csv_chunks(tmp_path):
+    path = write_csv(
+        tmp_path / "users.csv",
+        [Row._fields] + [(f"user{i}", f"pw{i}") for i in range(5)],
+    )
+    chunks = list(iter_typed_csv(path, Row, chunk_size=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert chunks[2] == [Row("user4", "pw4")]
+
+
+def test_iter_typed_csv_quoted_fields(tmp_path):
+    passwords = ["multi\nline", 'has "quotes"', "comma, tab\t; and \\ slash", "é€"]
+    path = write_csv(
+        tmp_path / "users.csv",
+        [Row._fields] + [(f"user{i}", pw) for i, pw in enumerate(passwords)],
+    )
+    rows = [row for chunk in iter_typed_csv(path, Row) for row in chunk]
+    assert [row.password for row in rows] == passwords
+
+
+def test_iter_typed_csv_skips_bad_rows(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text(
+        "username,password\nalice,1\n\nbob\n,\ncarol,3,extra\ndave,4\n",
+        encoding="utf-8",
+    )
+    stats = CsvStats()
+    rows = [
+        row for chunk in iter_typed_csv(str(path), Row, stats=stats) for row in chunk
+    ]
+    assert rows == [Row("alice", "1"), Row("dave", "4")]
+    assert (stats.rows, stats.skipped) == (2, 2)
+
+
+def test_sorted_typed_csv_merges_runs(tmp_path, monkeypatch):
+    # enough runs for more than one merge pass
+    monkeypatch.setattr(glue.util.csv, "max_open_runs", 3)
+    rng = random.Random(4)
+    rows = [(f"user{rng.randrange(50)}", f'pw {i}\n"{i}",') for i in range(200)]
+    path = write_csv(tmp_path / "users.csv", [Row._fields] + rows)
+    stats = CsvStats()
+    result = list(
+        sorted_typed_csv(
+            path, Row, key=lambda row: row.username, chunk_size=7, stats=stats
+        )
+    )
+    # stable: rows with equal usernames keep their file order
+    assert result == sorted((Row(*row) for row in rows), key=lambda row: row.username)
+    assert stats.rows == 200
+
+
+def test_sorted_typed_csv_spills_no_passwords(tmp_path, monkeypatch):
+    spill = tmp_path / "spill"
+    spill.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(spill))
+    rows = [(f"user{i}", f"secret{i}") for i in range(20, 0, -1)]
+    path = write_csv(tmp_path / "users.csv", [Row._fields] + rows)
+    result = sorted_typed_csv(path, Row, key=lambda row: row.username, chunk_size=3)
+    assert next(result) == Row("user1", "secret1")
+    spilled = [run.read_bytes() for run in spill.rglob("*") if run.is_file()]
+    assert spilled and not any(b"secret" in data for data in spilled)
+    assert len(list(result)) == 19
+    assert not list(spill.rglob("*"))
+
+
+def test_iter_typed_csv_bad_header(tmp_path):
+    path = write_csv(tmp_path / "users.csv", [("user", "password"), ("alice", "1")])
+    with pytest.raises(RuntimeError, match="header row has unexpected columns"):
+        list(iter_typed_csv(path, Row))
+    with pytest.raises(RuntimeError, match="header row has unexpected columns"):
+        list(sorted_typed_csv(path, Row, key=lambda row: row.username))
@@ -0,0 +1,82 @@
+"""tests for the dialect-independent parts of MultiDB"""
+
+import datetime
+
+import pytest
+
+from glue.db.multidb import MultiDB, compile_query, copy_text_buffer, copy_text_value
+
+
+def unconnected(dialect: str) -> MultiDB:
+    """a MultiDB of the given dialect which doesn't connect to anything"""
+    db = MultiDB.__new__(MultiDB)
+    db.dialect = dialect
+    return db
+
+
+query = "SELECT * FROM {ID_schema}.t WHERE a = {x} AND b IN ({names}) OR c = {x}"
+
+
+def test_prepare_postgresql():
+    compiled, params = unconnected("postgresql").prepare(
+        query, ID_schema="s", x=1, names=["p", "q"]
+    )
+    assert compiled.sql == (
+        "SELECT * FROM s.t WHERE a = %(x)s "
+        "AND b IN (%(names__0)s, %(names__1)s) OR c = %(x)s"
+    )
+    assert compiled.bind(params) == {"x": 1, "names__0": "p", "names__1": "q"}
+
+
+def test_prepare_sql_server():
+    compiled, params = unconnected("sql server").prepare(
+        query, ID_schema="s", x=1, names=("p", "q", "r")
+    )
+    assert compiled.sql == "SELECT * FROM s.t WHERE a = ? AND b IN (?, ?, ?) OR c = ?"
+    # a repeated paramater is bound once per reference
+    assert compiled.bind(params) == [1, "p", "q", "r", 1]
+
+
+def test_prepare_rejects_unsafe_values():
+    db = unconnected("postgresql")
+    with pytest.raises(RuntimeError, match="unsafe value"):
+        db.prepare(query, ID_schema="s; DROP TABLE t", x=1, names=["p"])
+    with pytest.raises(RuntimeError, match="cannot be empty"):
+        db.prepare(query, ID_schema="s", x=1, names=[])
+
+
+def test_compile_query_is_cached():
+    db = unconnected("sql server")
+    first, _ = db.prepare(query, ID_schema="cached", x=1, names=["p", "q"])
+    hits = compile_query.cache_info().hits
+    # the same template, interpolations and list sizes; only the values differ
+    second, params = db.prepare(query, ID_schema="cached", x=2, names=["s", "t"])
+    assert second is first
+    assert compile_query.cache_info().hits == hits + 1
+    assert second.bind(params) == [2, "s", "t", 2]
+    # a different list size is compiled separately
+    third, _ = db.prepare(query, ID_schema="cached", x=2, names=["s"])
+    assert third.sql.count("?") == 3
+
+
+@pytest.mark.parametrize(
+    "value, text",
+    [
+        (None, "\\N"),
+        ("", ""),
+        ("N", "N"),
+        ("\\N", "\\\\N"),
+        ("a\tb", "a\\tb"),
+        ("a\nb\r\n", "a\\nb\\r\\n"),
+        ("back\\slash", "back\\\\slash"),
+        (12, "12"),
+        (datetime.date(2024, 2, 29), "2024-02-29"),
+    ],
+)
+def test_copy_text_value(value, text):
+    assert copy_text_value(value) == text
+
+
+def test_copy_text_buffer():
+    buffer = copy_text_buffer([(1, "a\tb", None), (2, "c\nd", "")])
+    assert buffer.read() == "1\ta\\tb\t\\N\n2\tc\\nd\t\n"
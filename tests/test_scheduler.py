@@ -0,0 +1,82 @@
+"""tests for running tasks in the order given by their dependencies"""
+
+import threading
+
+import pytest
+
+from glue.scheduler import Task, run_tasks
+
+
+def test_run_tasks_passes_results():
+    results = run_tasks(
+        [
+            Task("sum", lambda done: done["a"] + done["b"], ("a", "b")),
+            Task("a", lambda done: 1),
+            Task("b", lambda done: 2),
+        ],
+        workers=2,
+    )
+    assert results == {"a": 1, "b": 2, "sum": 3}
+
+
+def test_run_tasks_runs_independent_tasks_together():
+    # each task waits for the other, so this only finishes if both run at once
+    barrier = threading.Barrier(2, timeout=5)
+    results = run_tasks(
+        [Task(name, lambda done: barrier.wait() is not None) for name in "ab"],
+        workers=2,
+    )
+    assert results == {"a": True, "b": True}
+
+
+def test_run_tasks_isolates_failures():
+    ran = []
+
+    def fail(done):
+        raise ValueError("boom")
+
+    def record(name):
+        return lambda done: ran.append(name)
+
+    with pytest.raises(RuntimeError) as excinfo:
+        run_tasks(
+            [
+                Task("bad", fail),
+                Task("after_bad", record("after_bad"), ("bad",)),
+                Task("after_after", record("after_after"), ("after_bad",)),
+                Task("good", record("good")),
+                Task("after_good", record("after_good"), ("good",)),
+            ],
+            workers=2,
+            label="step",
+        )
+    # the tasks which don't depend on the failure still run
+    assert sorted(ran) == ["after_good", "good"]
+    assert str(excinfo.value) == (
+        "step(s) failed: bad; skipped: after_bad, after_after"
+    )
+    assert isinstance(excinfo.value.__cause__, ValueError)
+
+
+def test_run_tasks_unknown_dependency():
+    with pytest.raises(RuntimeError, match="depends on unknown task"):
+        run_tasks([Task("a", lambda done: None, ("missing",))], workers=1)
+
+
+def test_run_tasks_duplicate_name():
+    with pytest.raises(RuntimeError, match="duplicate task name: a"):
+        run_tasks([Task("a", lambda done: None)] * 2, workers=1)
+
+
+def test_run_tasks_cycle():
+    ran = []
+    with pytest.raises(RuntimeError, match=r"cannot be satisfied: \['b', 'c'\]"):
+        run_tasks(
+            [
+                Task("a", lambda done: ran.append("a")),
+                Task("b", lambda done: ran.append("b"), ("a", "c")),
+                Task("c", lambda done: ran.append("c"), ("b",)),
+            ],
+            workers=1,
+        )
+    assert ran == ["a"]
@@ -0,0 +1,133 @@
+"""tests for splitting and scheduling multi-statement sql scripts"""
+
+from glue.db.script import (
+    checkpoint_units,
+    split_statements,
+    statement_access,
+    unit_dependencies,
+)
+
+
+def test_split_statements_semicolons_and_go():
+    sql = "CREATE TABLE a (x int);\nINSERT INTO a VALUES (1)\nGO\nSELECT 1 FROM a;"
+    assert split_statements(sql) == [
+        "CREATE TABLE a (x int)",
+        "INSERT INTO a VALUES (1)",
+        "SELECT 1 FROM a",
+    ]
+
+
+def test_split_statements_ignores_quoted_semicolons():
+    sql = (
+        "INSERT INTO a VALUES ('x;y', \"b;c\", [d;e]); -- a; comment\n"
+        "/* another; comment */ SELECT 1 FROM a"
+    )
+    statements = split_statements(sql)
+    assert len(statements) == 2
+    assert statements[0] == "INSERT INTO a VALUES ('x;y', \"b;c\", [d;e])"
+
+
+def test_split_statements_keeps_bodies_together():
+    sql = (
+        "CREATE FUNCTION f() RETURNS int AS $body$ SELECT 1; $body$ LANGUAGE sql;\n"
+        "IF 1 = 1 BEGIN SELECT CASE WHEN 1 = 1 THEN 1 END; SELECT 2; END;\n"
+        "SELECT 3"
+    )
+    assert len(split_statements(sql)) == 3
+
+
+def test_split_statements_drops_empty_statements():
+    assert split_statements(";; -- nothing\n;\n/* still nothing */") == []
+
+
+def test_checkpoint_units_keeps_temp_tables_together():
+    statements = [
+        "CREATE TABLE a (x int)",
+        "CREATE TEMP TABLE t AS SELECT x FROM a",
+        "INSERT INTO a SELECT x FROM t",
+        "DROP TABLE t",
+        "SELECT x INTO #s FROM a",
+        "SELECT x FROM #s",
+    ]
+    assert checkpoint_units(statements) == [range(0, 1), range(1, 4), range(4, 6)]
+
+
+def test_statement_access_writes():
+    assert statement_access("INSERT results.a SELECT x FROM b").writes == {"a"}
+    assert statement_access("MERGE INTO a USING b ON a.x = b.x").writes == {"a"}
+    assert statement_access("MERGE a USING b ON a.x = b.x").reads == {"b"}
+
+
+def test_unit_dependencies():
+    statements = [
+        "CREATE TABLE a (x int)",
+        "CREATE TABLE b (x int)",
+        "CREATE INDEX ia ON a (x)",
+        "INSERT INTO b SELECT x FROM a",
+        "SET search_path TO results",
+        "CREATE TABLE c (x int)",
+    ]
+    units = checkpoint_units(statements)
+    assert unit_dependencies(statements, units) == [
+        [],
+        [],
+        [0],
+        [0, 1],
+        [0, 1, 2, 3],
+        [4],
+    ]
+
+
+def test_unit_dependencies_barrier_after_comment():
+    statements = ["CREATE TABLE a (x int)", "-- setup\nSET search_path TO results"]
+    assert unit_dependencies(statements, checkpoint_units(statements)) == [[], [0]]
+
+
+def test_split_statements_keeps_declared_variables_in_one_batch():
+    sql = (
+        "CREATE TABLE a (x int);\n"
+        "DECLARE @x int; SET @x = 1; INSERT INTO a VALUES (@x);\n"
+        "GO\n"
+        "SELECT 1 FROM a"
+    )
+    assert split_statements(sql) == [
+        "CREATE TABLE a (x int)",
+        "DECLARE @x int; SET @x = 1; INSERT INTO a VALUES (@x);",
+        "SELECT 1 FROM a",
+    ]
+
+
+def test_statement_access_ignores_update_and_delete_clauses():
+    access = statement_access("UPDATE STATISTICS a")
+    assert access.writes == frozenset() and access.reads == {"a"}
+    access = statement_access(
+        "INSERT INTO a VALUES (1) ON CONFLICT (x) DO UPDATE SET x = 2"
+    )
+    assert access.writes == {"a"}
+    access = statement_access(
+        "ALTER TABLE a ADD FOREIGN KEY (x) REFERENCES b (x) "
+        "ON DELETE CASCADE ON UPDATE NO ACTION"
+    )
+    assert access.writes == {"a"} and access.reads == {"b"}
+
+
+def test_unit_dependencies_follow_foreign_keys():
+    statements = [
+        "CREATE TABLE parent (x int PRIMARY KEY)",
+        "CREATE TABLE child (x int)",
+        "ALTER TABLE child ADD FOREIGN KEY (x) REFERENCES parent (x)",
+        "INSERT INTO parent VALUES (1)",
+        "INSERT INTO child VALUES (1)",
+        "DELETE FROM parent",
+    ]
+    units = checkpoint_units(statements)
+    # the child's rows need the parent's, so each write to one waits for the
+    # writes to the other
+    assert unit_dependencies(statements, units) == [
+        [],
+        [0],
+        [0, 1],
+        [0, 1, 2],
+        [0, 1, 2, 3],
+        [0, 1, 2, 3, 4],
+    ]
@@ -0,0 +1,118 @@
+"""tests for the bcrypt helpers and the password verification cache"""
+
+import json
+import os
+import stat
+
+import pytest
+
+import glue.util.security
+from glue.util.security import (
+    VerificationCache,
+    calibrate_bcrypt_rounds,
+    max_bcrypt_rounds,
+    min_bcrypt_rounds,
+)
+
+
+@pytest.fixture
+def measured(monkeypatch):
+    """make bcrypt_cost report the given seconds for the cheapest cost"""
+    costs = []
+
+    def measure(seconds):
+        monkeypatch.setattr(
+            glue.util.security,
+            "bcrypt_cost",
+            lambda rounds: costs.append(rounds) or seconds,
+        )
+        return costs
+
+    return measure
+
+
+def test_calibrate_bcrypt_rounds_extrapolates(measured):
+    costs = measured(0.01)
+    # each round doubles the time: 10 -> 0.01s, 11 -> 0.02s, ..., 14 -> 0.16s
+    assert calibrate_bcrypt_rounds(0.25) == (14, pytest.approx(0.16))
+    # only the cheapest cost is measured
+    assert costs == [min_bcrypt_rounds]
+
+
+def test_calibrate_bcrypt_rounds_lower_bound(measured):
+    measured(1.0)
+    assert calibrate_bcrypt_rounds(0.001) == (min_bcrypt_rounds, 1.0)
+
+
+def test_calibrate_bcrypt_rounds_upper_bound(measured):
+    measured(1e-9)
+    assert calibrate_bcrypt_rounds(1e9)[0] == max_bcrypt_rounds
+
+
+def test_verification_cache_hit(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = VerificationCache(path, "secret")
+    assert not cache.check("alice", "pw", "hash")
+    cache.remember("alice", "pw", "hash")
+    cache.save()
+
+    cache = VerificationCache(path, "secret")
+    assert cache.check("alice", "pw", "hash")
+    # a different password, or the right one under a different secret, misses
+    assert not VerificationCache(path, "secret").check("alice", "other", "hash")
+    assert not VerificationCache(path, "other").check("alice", "pw", "hash")
+    # the file holds no passwords
+    assert "pw" not in open(path, encoding="utf-8").read()
+
+
+def test_verification_cache_stale_hash(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = VerificationCache(path, "secret")
+    cache.remember("alice", "pw", "hash")
+    assert not cache.check("alice", "pw", "new hash")
+    # the stale entry is dropped
+    assert "alice" not in cache.entries
+
+
+def test_verification_cache_evicts_unseen_users(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = VerificationCache(path, "secret")
+    cache.remember("alice", "pw", "hash")
+    cache.remember("bob", "pw", "hash")
+    cache.save()
+
+    cache = VerificationCache(path, "secret")
+    assert cache.check("alice", "pw", "hash")
+    cache.save()
+    with open(path, encoding="utf-8") as cachefh:
+        assert list(json.load(cachefh)) == ["alice"]
+
+
+def test_verification_cache_file(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text("not json", encoding="utf-8")
+    os.chmod(path, 0o644)
+    # an unreadable cache is ignored, then replaced
+    cache = VerificationCache(str(path), "secret")
+    assert cache.entries == {}
+    cache.remember("alice", "pw", "hash")
+    cache.save()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert [entry.name for entry in tmp_path.iterdir()] == ["cache.json"]
+
+
+def test_verification_cache_failed_save(tmp_path, monkeypatch):
+    path = tmp_path / "cache.json"
+    path.write_text("{}", encoding="utf-8")
+    cache = VerificationCache(str(path), "secret")
+    cache.remember("alice", "pw", "hash")
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        cache.save()
+    # the old file is untouched and the temp file is gone
+    assert path.read_text(encoding="utf-8") == "{}"
+    assert [entry.name for entry in tmp_path.iterdir()] == ["cache.json"]
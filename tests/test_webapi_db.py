@@ -0,0 +1,230 @@
+"""tests for reconciling the bulk user file with the security db"""
+
+import contextlib
+import csv
+
+import pytest
+
+from glue.config import GlueConfig
+from glue.db.multidb import MultiDB
+from glue.models import BasicSecurityUser, BasicSecurityUserBulkEntry
+from glue.util.csv import CsvStats
+from glue.util.security import bcrypt_hash
+from glue.webapi_db import (
+    bulk_ensure_basic_security_users,
+    indexed_user_pairs,
+    merged_user_pairs,
+)
+
+
+class FakeDB:
+    """stands in for MultiDB: serves the given users and records the writes"""
+
+    def __init__(self, users, dialect="postgresql"):
+        self.users = users
+        self.dialect = dialect
+        self.executed = []
+
+    def iter_rows(self, sql, **params):
+        return iter(self.users)
+
+    def dialect_sqlfile(self, filename):
+        return filename
+
+    def execute(self, sql, **params):
+        self.executed.append((sql, params))
+
+    def execute_many(self, sql, param_sets, **params):
+        self.executed.append((sql, list(param_sets)))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        yield self
+
+    def staged(self):
+        return sorted(
+            params["username"]
+            for sql, param_sets in self.executed
+            if sql == "stage_user.sql"
+            for params in param_sets
+        )
+
+    def deleted(self):
+        return sorted(
+            username
+            for _, params in self.executed
+            if isinstance(params, dict)
+            for username in params.get("usernames", ())
+        )
+
+
+def db_user(username, password):
+    return BasicSecurityUser(username, bcrypt_hash(password, 4), "f", "", "l")
+
+
+def bulk_config(tmp_path, rows, *args):
+    path = tmp_path / "users.csv"
+    with open(path, "w", newline="", encoding="utf-8") as csvfh:
+        writer = csv.writer(csvfh, dialect=csv.unix_dialect)
+        writer.writerow(BasicSecurityUserBulkEntry._fields)
+        writer.writerows(
+            (username, password, "f", "", "l") for username, password in rows
+        )
+    return GlueConfig(
+        cli_args=["--bulk-user-file", str(path), "--bcrypt-rounds", "4", *args]
+    )
+
+
+def test_indexed_user_pairs(tmp_path):
+    config = bulk_config(tmp_path, [("carol", "3"), ("alice", "1"), ("alice", "x")])
+    db = FakeDB([db_user("bob", "2"), db_user("alice", "1"), db_user("dave", "4")])
+    pairs = [
+        (
+            csv_record and csv_record.username,
+            csv_record and csv_record.password,
+            db_record and db_record.username,
+        )
+        for csv_record, db_record in indexed_user_pairs(config, db, CsvStats())
+    ]
+    # the file's order, without the repeated alice, then the db-only users
+    assert pairs == [
+        ("carol", "3", None),
+        ("alice", "1", "alice"),
+        (None, None, "bob"),
+        (None, None, "dave"),
+    ]
+
+
+def pair_names(pairs):
+    return [
+        (csv_record and csv_record.username, db_record and db_record.username)
+        for csv_record, db_record in pairs
+    ]
+
+
+def test_merged_user_pairs(tmp_path):
+    config = bulk_config(
+        tmp_path, [("dave", "4"), ("alice", "1"), ("carol", "3"), ("alice", "x")]
+    )
+    db = FakeDB([db_user("alice", "1"), db_user("bob", "2"), db_user("erin", "5")])
+    pairs = list(merged_user_pairs(config, db, CsvStats()))
+    assert pair_names(pairs) == [
+        ("alice", "alice"),
+        (None, "bob"),
+        ("carol", None),
+        ("dave", None),
+        (None, "erin"),
+    ]
+    # the first of the repeated entries is the one kept
+    assert pairs[0][0].password == "1"
+
+
+def test_merged_user_pairs_sql_server_order(tmp_path):
+    # sql server compares nvarchar by utf-16 code unit, which puts characters
+    # outside the bmp (stored as surrogates, d800-dfff) before e.g. u+ff21,
+    # unlike python's code point order
+    names = ["z", "é", "€", "\U0001f600", "\uff21"]
+    config = bulk_config(tmp_path, [(name, "1") for name in reversed(names)])
+    db = FakeDB([db_user(name, "1") for name in names], "sql server")
+    assert pair_names(merged_user_pairs(config, db, CsvStats())) == [
+        (name, name) for name in names
+    ]
+    # the same db order is out of order by code point
+    db = FakeDB([db_user(name, "1") for name in names], "postgresql")
+    with pytest.raises(RuntimeError, match="out of order"):
+        list(merged_user_pairs(config, db, CsvStats()))
+
+
+def test_merged_user_pairs_out_of_order(tmp_path):
+    config = bulk_config(tmp_path, [("alice", "1")])
+    db = FakeDB([db_user("bob", "2"), db_user("alice", "1")])
+    with pytest.raises(RuntimeError, match="security db users are out of order"):
+        list(merged_user_pairs(config, db, CsvStats()))
+
+
+def test_merged_bulk_users_classification(tmp_path, monkeypatch):
+    config = bulk_config(
+        tmp_path,
+        [("carol", "3"), ("bob", "changed"), ("alice", "1")],
+        "--bulk-user-delete",
+        "--bulk-user-merge-join",
+    )
+    db = FakeDB([db_user("alice", "1"), db_user("bob", "2"), db_user("dave", "4")])
+
+    # the merge join reads the db users over a second connection
+    class ReaderDB(MultiDB):
+        def __new__(cls, **params):
+            return contextlib.nullcontext(db)
+
+    monkeypatch.setattr("glue.webapi_db.MultiDB", ReaderDB)
+    result = bulk_ensure_basic_security_users(config, db)
+    assert result.statuses == {
+        "alice": "OK",
+        "bob": "UPDATED",
+        "carol": "CREATED",
+        "dave": "DELETED",
+    }
+    assert db.deleted() == ["dave"]
+
+
+def test_bulk_users_classification(tmp_path):
+    config = bulk_config(
+        tmp_path,
+        [("alice", "1"), ("bob", "changed"), ("carol", "3")],
+        "--bulk-user-delete",
+    )
+    db = FakeDB([db_user("alice", "1"), db_user("bob", "2"), db_user("dave", "4")])
+    result = bulk_ensure_basic_security_users(config, db)
+    assert result.statuses == {
+        "alice": "OK",
+        "bob": "UPDATED",
+        "carol": "CREATED",
+        "dave": "DELETED",
+    }
+    assert sorted(user.username for user in result.changed) == ["bob", "carol"]
+    assert db.staged() == ["bob", "carol"]
+    assert db.deleted() == ["dave"]
+
+
+def test_bulk_users_delete_not_enabled(tmp_path):
+    config = bulk_config(tmp_path, [("alice", "1")])
+    db = FakeDB([db_user("alice", "1"), db_user("dave", "4")])
+    result = bulk_ensure_basic_security_users(config, db)
+    assert result.statuses == {"alice": "OK", "dave": "ERROR"}
+    assert db.deleted() == []
+
+
+@pytest.mark.parametrize("merge_join", [False, True])
+def test_bulk_users_no_deletes_from_unreadable_file(tmp_path, monkeypatch, merge_join):
+    args = ["--bulk-user-delete"] + (["--bulk-user-merge-join"] if merge_join else [])
+    users = [db_user("alice", "1"), db_user("bob", "2")]
+
+    class ReaderDB(MultiDB):
+        def __new__(cls, **params):
+            return contextlib.nullcontext(FakeDB(users))
+
+    monkeypatch.setattr("glue.webapi_db.MultiDB", ReaderDB)
+
+    # a file with no users
+    db = FakeDB(users)
+    result = bulk_ensure_basic_security_users(bulk_config(tmp_path, [], *args), db)
+    assert result.statuses == {"alice": "ERROR", "bob": "ERROR"}
+    assert db.deleted() == []
+
+    # a file with a row which couldn't be read
+    config = bulk_config(tmp_path, [("alice", "1")], *args)
+    with open(config.bulk_user_file, "a", encoding="utf-8") as csvfh:
+        csvfh.write("bob,2\n")
+    db = FakeDB(users)
+    result = bulk_ensure_basic_security_users(config, db)
+    assert result.statuses == {"alice": "OK", "bob": "ERROR"}
+    assert db.deleted() == []
+
+    # a file with the wrong header
+    config = bulk_config(tmp_path, [], *args)
+    with open(config.bulk_user_file, "w", encoding="utf-8") as csvfh:
+        csvfh.write("user,password,firstname,middlename,lastname\nalice,1,f,,l\n")
+    db = FakeDB(users)
+    with pytest.raises(RuntimeError, match="header row"):
+        bulk_ensure_basic_security_users(config, db)
+    assert db.deleted() == []